@@ -1,4 +1,23 @@
 YOUTUBE_CHANNELS = [
     "UChpleBmo18P08aKCIgti38g", # Matt Wolfe
     "UCawZsQWqfGSbCI5yjkdVkTA", # Matthew Berman
-]
\ No newline at end of file
+]
+
+# Feed URL -> source label (the account name for X feeds)
+OPENAI_FEEDS = {
+    "https://openai.com/news/rss.xml": "OpenAI News",
+}
+
+ANTHROPIC_FEEDS = {
+    "https://raw.githubusercontent.com/Olshansk/rss-feeds/main/feeds/feed_anthropic_news.xml": "Anthropic News",
+    "https://raw.githubusercontent.com/Olshansk/rss-feeds/main/feeds/feed_anthropic_research.xml": "Anthropic Research",
+    "https://raw.githubusercontent.com/Olshansk/rss-feeds/main/feeds/feed_anthropic_engineering.xml": "Anthropic Engineering",
+}
+
+X_FEEDS = {
+    "https://rss.app/feeds/fCifMnuCaCowLWra.xml": "GoogleAI",
+    "https://rss.app/feeds/Q5rW7ItVWp4ku2hB.xml": "ollama",
+    "https://rss.app/feeds/yi4TN3YdV6cdfaRy.xml": "NVIDIAAI",
+    "https://rss.app/feeds/6tUN75HYDHwtfszj.xml": "AIatMeta",
+    "https://rss.app/feeds/XUhcVCEsFbmpnTjs.xml": "GoogleDeepMind",
+}
@@ -0,0 +1,196 @@
+"""
+A small executor for pipelines declared as a graph of stages.
+
+Each stage names the stages it depends on and runs once they have all
+succeeded; stages whose dependencies are done run at the same time. A stage
+can take one slot of a named resource, such as "network" or "llm", to cap
+how many stages use it at once. If a stage fails, everything downstream of it
+is skipped. After a run, critical_path_report() shows when each stage ran and
+the chain of stages that determined the total time.
+
+To resume an earlier run, pass the outputs of the stages that already
+succeeded as completed; they are not run again and their outputs are handed
+to the stages that depend on them. on_finish is called with every stage's
+outcome as it is known, for example to checkpoint it.
+"""
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+import logging
+import time
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class Stage(BaseModel):
+    name: str
+    # Gets the results of the stages it depends on, keyed by stage name
+    run: Callable[[Dict[str, Any]], Any]
+    depends_on: List[str] = []
+    resource: Optional[str] = None
+
+
+class StageResult(BaseModel):
+    name: str
+    status: str  # "succeeded", "failed" or "skipped"
+    started: Optional[float] = None  # seconds since the run started
+    finished: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    resumed: bool = False
+
+    @property
+    def duration(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+
+class DagExecutor:
+    def __init__(self, stages: List[Stage], max_workers: Optional[int] = None,
+                 resources: Optional[Dict[str, int]] = None, completed: Optional[Dict[str, Any]] = None,
+                 on_finish: Optional[Callable[[StageResult], None]] = None):
+        """resources maps a resource name to how many stages may hold it at once"""
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        for stage in stages:
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage {stage.name!r} depends on unknown stage {dependency!r}")
+        self.order = self._topological_order()
+        self.max_workers = max_workers or len(stages)
+        self.resources = resources or {}
+        self.completed = completed or {}
+        self.on_finish = on_finish
+        self.results: Dict[str, StageResult] = {}
+        self.started_at: Optional[datetime] = None
+        self.elapsed = 0.0
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        visiting = set()
+
+        def visit(name: str) -> None:
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Stages form a cycle through {name!r}")
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def run(self) -> Dict[str, StageResult]:
+        """Run every stage, returning the outcome of each by name"""
+        start = time.monotonic()
+        self.started_at = datetime.now(timezone.utc)
+        self.results = {
+            name: StageResult(name=name, status="succeeded", result=output, resumed=True)
+            for name, output in self.completed.items() if name in self.stages
+        }
+        if self.results:
+            logger.info(f"Resuming after completed stages: {', '.join(self.results)}")
+        in_use: Dict[str, int] = {}
+        running: Dict[Future, str] = {}
+        started: Dict[str, float] = {}
+
+        def can_start(stage: Stage) -> bool:
+            if any(d not in self.results or self.results[d].status != "succeeded" for d in stage.depends_on):
+                return False
+            if stage.resource is None:
+                return True
+            return in_use.get(stage.resource, 0) < self.resources.get(stage.resource, 1)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as pool:
+            while len(self.results) < len(self.stages):
+                for name in self.order:
+                    stage = self.stages[name]
+                    if name in self.results or name in running.values():
+                        continue
+                    blocked = [d for d in stage.depends_on if d in self.results and self.results[d].status != "succeeded"]
+                    if blocked:
+                        self._finish(StageResult(name=name, status="skipped", error=f"{blocked[0]} did not succeed"))
+                        logger.warning(f"✗ Skipping stage {name}: {blocked[0]} did not succeed")
+                    elif len(running) < self.max_workers and can_start(stage):
+                        if stage.resource:
+                            in_use[stage.resource] = in_use.get(stage.resource, 0) + 1
+                        inputs = {d: self.results[d].result for d in stage.depends_on}
+                        logger.info(f"Starting stage {name}")
+                        started[name] = time.monotonic() - start
+                        running[pool.submit(stage.run, inputs)] = name
+                if not running:
+                    # Everything left was just skipped
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    stage = self.stages[name]
+                    if stage.resource:
+                        in_use[stage.resource] -= 1
+                    finished = time.monotonic() - start
+                    try:
+                        result = StageResult(name=name, status="succeeded", result=future.result(),
+                                             started=started[name], finished=finished)
+                        logger.info(f"✓ Stage {name} finished in {result.duration:.1f}s")
+                    except Exception as e:
+                        result = StageResult(name=name, status="failed", error=str(e),
+                                             started=started[name], finished=finished)
+                        logger.error(f"✗ Stage {name} failed after {result.duration:.1f}s: {e}", exc_info=True)
+                    self._finish(result)
+
+        self.elapsed = time.monotonic() - start
+        return self.results
+
+    def _finish(self, result: StageResult) -> None:
+        self.results[result.name] = result
+        if self.on_finish:
+            try:
+                self.on_finish(result)
+            except Exception as e:
+                logger.error(f"✗ Failed to record the outcome of stage {result.name}: {e}")
+
+    def critical_path(self) -> List[str]:
+        """
+        The chain of stages that ended last, each preceded by the dependency
+        that finished last before it. Shortening any other stage would not
+        have made the run faster.
+        """
+        ran = [r for r in self.results.values() if r.finished is not None]
+        if not ran:
+            return []
+        path = [max(ran, key=lambda r: r.finished).name]
+        while True:
+            dependencies = [
+                self.results[d] for d in self.stages[path[-1]].depends_on
+                if self.results[d].finished is not None
+            ]
+            if not dependencies:
+                break
+            path.append(max(dependencies, key=lambda r: r.finished).name)
+        return list(reversed(path))
+
+    def critical_path_report(self) -> str:
+        critical = set(self.critical_path())
+        header = "stage"
+        width = max(len(name) for name in [header, *self.stages])
+        lines = [f"{header:<{width}}  {'start':>8}  {'time':>8}  status"]
+        for name in self.order:
+            result = self.results.get(name)
+            if result is None:
+                continue
+            start = f"{result.started:.1f}s" if result.started is not None else "-"
+            duration = f"{result.duration:.1f}s" if result.started is not None else "-"
+            marker = " *" if name in critical else ""
+            status = "resumed" if result.resumed else result.status
+            lines.append(f"{name:<{width}}  {start:>8}  {duration:>8}  {status}{marker}")
+        path = self.critical_path()
+        path_time = sum(self.results[name].duration for name in path)
+        lines.append(f"Critical path (*): {' -> '.join(path)}, {path_time:.1f}s of {self.elapsed:.1f}s total")
+        return "\n".join(lines)
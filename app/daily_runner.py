@@ -1,16 +1,23 @@
+import json
 import logging
-from datetime import datetime
+import sys
+from datetime import datetime, timedelta
+from typing import Any, List
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from app.dag import DagExecutor, Stage, StageResult
 from app.runner import run_scrapers
 from app.services.process_anthropic import process_anthropic_markdown
+from app.services.process_x import process_x_markdown
 from app.services.process_youtube import process_youtube_transcripts
 from app.services.process_digest import process_digests
 from app.services.process_email import send_digest_email
-from app.database.models import Base
-from app.database.connection import engine
+from app.services.streaming import StreamingPipeline
+from app.database.migrations import run_migrations
+from app.database.repository import Repository
+from app.scrapers.fetcher import get_fetcher
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,12 +27,99 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def run_daily_pipeline(hours: int = 24, top_n: int = 10) -> dict:
+# Stages holding "network" fetch pages or transcripts; "llm" calls the digest model
+DAILY_RESOURCES = {"network": 3, "llm": 1}
+
+
+def _migrate() -> List[str]:
+    applied = run_migrations()
+    logger.info("✓ Database tables verified/created")
+    if applied:
+        logger.info(f"✓ Applied migrations: {', '.join(applied)}")
+    return applied
+
+
+def _scrape(hours: int) -> dict:
+    scraping_results = run_scrapers(hours=hours)
+    counts = {source: len(scraping_results.get(source, [])) for source in ("youtube", "openai", "anthropic", "x")}
+    logger.info(f"✓ Scraped {counts['youtube']} YouTube videos, {counts['openai']} OpenAI articles, "
+                f"{counts['anthropic']} Anthropic articles, {counts['x']} X posts")
+    return counts
+
+
+def _send_email(hours: int, top_n: int) -> dict:
+    email_result = send_digest_email(hours=hours, top_n=top_n)
+    if email_result["success"]:
+        logger.info(f"✓ Email sent successfully with {email_result['articles_count']} articles")
+    else:
+        # Raised so the stage counts as failed and a resumed run sends it again
+        raise RuntimeError(f"Failed to send email: {email_result.get('error', 'Unknown error')}")
+    return email_result
+
+
+def _checkpoint_output(output: Any) -> Any:
+    """A stage's output as plain JSON, for the stage_runs table"""
+    return json.loads(json.dumps(output, default=str))
+
+
+def build_daily_stages(hours: int = 24, top_n: int = 10, streaming: bool = False) -> List[Stage]:
+    """
+    The daily pipeline as a graph. Markdown and transcripts for each source
+    depend only on the scrape, so they run side by side; digests wait for all
+    of them. With streaming, those stages are replaced by one StreamingPipeline
+    stage that digests each item as soon as its content is stored.
+    """
+    stages = [Stage(name="scrape", run=lambda inputs: _scrape(hours), resource="network")]
+    if streaming:
+        stages.append(Stage(name="stream", run=lambda inputs: StreamingPipeline().run(), depends_on=["scrape"]))
+        digest_stage = "stream"
+    else:
+        stages += [
+            Stage(name="anthropic_markdown", run=lambda inputs: process_anthropic_markdown(),
+                  depends_on=["scrape"], resource="network"),
+            Stage(name="x_markdown", run=lambda inputs: process_x_markdown(),
+                  depends_on=["scrape"], resource="network"),
+            Stage(name="youtube_transcripts", run=lambda inputs: process_youtube_transcripts(),
+                  depends_on=["scrape"], resource="network"),
+            Stage(name="digests", run=lambda inputs: process_digests(),
+                  depends_on=["anthropic_markdown", "x_markdown", "youtube_transcripts"], resource="llm"),
+        ]
+        digest_stage = "digests"
+    stages.append(Stage(name="email", run=lambda inputs: _send_email(hours, top_n), depends_on=[digest_stage]))
+    return stages
+
+
+def run_daily_pipeline(hours: int = 24, top_n: int = 10, streaming: bool = False, resume: bool = False) -> dict:
+    """
+    Scrape, process, digest and email, running independent stages at the
+    same time; see build_daily_stages.
+
+    Every run and the outcome of each of its stages are recorded in the
+    pipeline_runs and stage_runs tables. With resume, if the latest run did
+    not succeed, it is continued with its own parameters: stages that
+    succeeded are skipped and their recorded outputs are used instead.
+    """
     start_time = datetime.now()
     logger.info("=" * 60)
     logger.info("Starting Daily AI News Aggregator Pipeline")
     logger.info("=" * 60)
     
+    # Before anything else, since the checkpoint tables are created here
+    _migrate()
+    repo = Repository()
+    run = repo.get_latest_pipeline_run() if resume else None
+    if run and run.status != "succeeded":
+        hours = run.params.get("hours", hours)
+        top_n = run.params.get("top_n", top_n)
+        streaming = run.params.get("streaming", streaming)
+        completed = repo.get_completed_stages(run.id)
+        logger.info(f"Resuming pipeline run {run.id} from {run.started_at}")
+    else:
+        if resume:
+            logger.info("No unfinished pipeline run to resume, starting a new one")
+        run = repo.create_pipeline_run({"hours": hours, "top_n": top_n, "streaming": streaming})
+        completed = {}
+    
     results = {
         "start_time": start_time.isoformat(),
         "scraping": {},
@@ -35,58 +129,46 @@ def run_daily_pipeline(hours: int = 24, top_n: int = 10) -> dict:
         "success": False
     }
     
-    try:
-        logger.info("\n[0/5] Ensuring database tables exist...")
-        try:
-            with engine.connect() as conn:
-                Base.metadata.create_all(engine)
-                logger.info("✓ Database tables verified/created")
-        except Exception as e:
-            logger.error(f"Failed to create database tables: {e}")
-            raise
-        
-        logger.info("\n[1/5] Scraping articles from sources...")
-        scraping_results = run_scrapers(hours=hours)
-        results["scraping"] = {
-            "youtube": len(scraping_results.get("youtube", [])),
-            "openai": len(scraping_results.get("openai", [])),
-            "anthropic": len(scraping_results.get("anthropic", []))
+    def checkpoint(stage: StageResult) -> None:
+        started_at = finished_at = None
+        if stage.started is not None:
+            started_at = executor.started_at + timedelta(seconds=stage.started)
+            finished_at = executor.started_at + timedelta(seconds=stage.finished)
+        repo.save_stage_run(run.id, stage.name, stage.status, started_at=started_at, finished_at=finished_at,
+                            output=_checkpoint_output(stage.result), error=stage.error)
+
+    executor = DagExecutor(build_daily_stages(hours=hours, top_n=top_n, streaming=streaming),
+                           resources=DAILY_RESOURCES, completed=completed, on_finish=checkpoint)
+    stages = executor.run()
+
+    def output(name: str) -> dict:
+        stage = stages.get(name)
+        return stage.result if stage and stage.status == "succeeded" else {}
+
+    results["scraping"] = output("scrape")
+    if streaming:
+        results["processing"] = output("stream").get("processing", {})
+        results["digests"] = output("stream").get("digests", {})
+    else:
+        results["processing"] = {
+            source: output(f"{source}_{kind}")
+            for source, kind in (("anthropic", "markdown"), ("x", "markdown"), ("youtube", "transcripts"))
         }
-        logger.info(f"✓ Scraped {results['scraping']['youtube']} YouTube videos, "
-                    f"{results['scraping']['openai']} OpenAI articles, "
-                    f"{results['scraping']['anthropic']} Anthropic articles")
-        
-        logger.info("\n[2/5] Processing Anthropic markdown...")
-        anthropic_result = process_anthropic_markdown()
-        results["processing"]["anthropic"] = anthropic_result
-        logger.info(f"✓ Processed {anthropic_result['processed']} Anthropic articles "
-                    f"({anthropic_result['failed']} failed)")
-        
-        logger.info("\n[3/5] Processing YouTube transcripts...")
-        youtube_result = process_youtube_transcripts()
-        results["processing"]["youtube"] = youtube_result
-        logger.info(f"✓ Processed {youtube_result['processed']} transcripts "
-                    f"({youtube_result['unavailable']} unavailable)")
-        
-        logger.info("\n[4/5] Creating digests for articles...")
-        digest_result = process_digests()
-        results["digests"] = digest_result
-        logger.info(f"✓ Created {digest_result['processed']} digests "
-                    f"({digest_result['failed']} failed out of {digest_result['total']} total)")
-        
-        logger.info("\n[5/5] Generating and sending email digest...")
-        email_result = send_digest_email(hours=hours, top_n=top_n)
-        results["email"] = email_result
-        
-        if email_result["success"]:
-            logger.info(f"✓ Email sent successfully with {email_result['articles_count']} articles")
-            results["success"] = True
-        else:
-            logger.error(f"✗ Failed to send email: {email_result.get('error', 'Unknown error')}")
-        
+        results["digests"] = output("digests")
+    results["email"] = output("email")
+    results["success"] = bool(results["email"].get("success"))
+    failures = [stage for stage in stages.values() if stage.status == "failed"]
+    if failures:
+        logger.error(f"Pipeline failed in stage {failures[0].name}: {failures[0].error}")
+        results["error"] = failures[0].error
+    results["stages"] = {name: stage.status for name, stage in stages.items()}
+    results["pipeline_run_id"] = run.id
+    try:
+        repo.finish_pipeline_run(run.id, "succeeded" if not failures and results["success"] else "failed")
     except Exception as e:
-        logger.error(f"Pipeline failed with error: {e}", exc_info=True)
-        results["error"] = str(e)
+        logger.error(f"✗ Failed to record the end of pipeline run {run.id}: {e}")
+    finally:
+        repo.session.close()
     
     end_time = datetime.now()
     duration = (end_time - start_time).total_seconds()
@@ -101,11 +183,14 @@ def run_daily_pipeline(hours: int = 24, top_n: int = 10) -> dict:
     logger.info(f"Processed: {results['processing']}")
     logger.info(f"Digests: {results['digests']}")
     logger.info(f"Email: {'Sent' if results['success'] else 'Failed'}")
+    logger.info("Stage timings:\n" + executor.critical_path_report())
+    get_fetcher().log_stats()
     logger.info("=" * 60)
     
     return results
 
 
 if __name__ == "__main__":
-    result = run_daily_pipeline(hours=24, top_n=10)
+    result = run_daily_pipeline(hours=24, top_n=10, streaming="--streaming" in sys.argv,
+                                resume="--resume" in sys.argv)
     exit(0 if result["success"] else 1)
@@ -0,0 +1,98 @@
+"""
+Benchmark CompressedText against plain Text on the configured database.
+
+Copies up to --rows transcripts and markdown bodies (or generated text if
+the database has none) into scratch tables, one per codec, and reports
+stored size plus write and read throughput. The scratch tables are dropped
+afterwards.
+
+Usage: python app/database/benchmark_compression.py [--rows 500]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, func, select, text
+from sqlalchemy.engine import Connection
+
+from app.database.compression import CompressedText, zstandard
+from app.database.connection import engine
+from app.database.models import ContentItem
+
+MB = 1024 * 1024
+
+
+def sample_bodies(conn: Connection, rows: int) -> List[str]:
+    query = select(ContentItem.body).where(ContentItem.body.isnot(None)).limit(rows)
+    bodies = [body for body in conn.execute(query).scalars() if body]
+    if bodies:
+        return bodies
+
+    # Roughly transcript-like text: a limited vocabulary in long runs
+    rng = random.Random(0)
+    words = [
+        "model", "training", "the", "and", "we", "data", "agent", "so", "you", "know", "really",
+        "inference", "token", "context", "benchmark", "release", "open", "source", "research", "like",
+    ]
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(2000, 12000))) for _ in range(rows)]
+
+
+def table_bytes(conn: Connection, table: Table) -> int:
+    if conn.dialect.name == "postgresql":
+        return conn.execute(text("SELECT pg_total_relation_size(:name)"), {"name": table.name}).scalar()
+    return conn.execute(select(func.sum(func.length(table.c.body)))).scalar() or 0
+
+
+def run(rows: int) -> None:
+    variants = [("text", Text()), ("none", CompressedText("none")), ("zlib", CompressedText("zlib"))]
+    if zstandard is not None:
+        variants.append(("zstd", CompressedText("zstd")))
+
+    metadata = MetaData()
+    tables = {
+        name: Table(f"bench_compression_{name}", metadata,
+                    Column("id", Integer, primary_key=True), Column("body", column_type))
+        for name, column_type in variants
+    }
+
+    with engine.connect() as conn:
+        bodies = sample_bodies(conn, rows)
+    raw_bytes = sum(len(b.encode("utf-8")) for b in bodies)
+    print(f"{len(bodies)} bodies, {raw_bytes / MB:.1f} MB of text on {engine.dialect.name}\n")
+    print(f"{'codec':<6} {'stored MB':>10} {'ratio':>7} {'write MB/s':>11} {'read MB/s':>10}")
+
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    try:
+        for name, table in tables.items():
+            started = time.perf_counter()
+            with engine.begin() as conn:
+                conn.execute(table.insert(), [{"id": i, "body": body} for i, body in enumerate(bodies)])
+            write_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            with engine.connect() as conn:
+                read = sum(len(body) for body in conn.execute(select(table.c.body)).scalars())
+            read_seconds = time.perf_counter() - started
+            assert read == sum(len(b) for b in bodies)
+
+            with engine.connect() as conn:
+                stored = table_bytes(conn, table)
+            print(f"{name:<6} {stored / MB:>10.2f} {raw_bytes / max(stored, 1):>7.2f} "
+                  f"{raw_bytes / MB / write_seconds:>11.1f} {raw_bytes / MB / read_seconds:>10.1f}")
+    finally:
+        metadata.drop_all(engine)
+
+    if engine.dialect.name == "postgresql":
+        print("\nPostgres sizes include TOAST, which already compresses plain text with pglz or lz4")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark compressed text storage")
+    parser.add_argument("--rows", type=int, default=500)
+    run(parser.parse_args().rows)
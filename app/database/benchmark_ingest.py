@@ -0,0 +1,90 @@
+"""
+Benchmark ingestion paths on the configured database.
+
+Inserts --rows generated items, spread over 30 days and the four sources,
+through three paths: ORM objects with a lookup per row (how bulk_create_*
+used to work), the batched INSERT ... ON CONFLICT statements, and the COPY
+bulk load (Postgres only). Rows use benchmark-only sources and are deleted
+afterwards.
+
+Usage: python app/database/benchmark_ingest.py [--rows 20000]
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import delete
+
+from app.database.connection import get_session
+from app.database.models import ContentItem
+from app.database.repository import Repository
+
+SOURCES = ["youtube", "openai", "anthropic", "x"]
+
+
+def generate_rows(count: int) -> List[dict]:
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "external_id": f"item-{i}",
+            "title": f"Benchmark item {i}",
+            "url": f"https://example.com/{i}",
+            "published_at": now - timedelta(seconds=rng.randint(0, 30 * 24 * 3600)),
+            "description": "Summary text for a generated item. " * rng.randint(1, 10),
+            "extras": {"category": rng.choice(["Research", "Product", None]), "origin": rng.choice(SOURCES)},
+        }
+        for i in range(count)
+    ]
+
+
+def orm_per_row(repo: Repository, source: str, rows: List[dict]) -> int:
+    inserted = 0
+    for row in rows:
+        if not repo.session.get(ContentItem, (source, row["external_id"])):
+            repo.session.add(ContentItem(source=source, **row))
+            inserted += 1
+    repo.session.commit()
+    return inserted
+
+
+def run(rows: int) -> None:
+    data = generate_rows(rows)
+    paths = [
+        ("orm per row", lambda repo, source: orm_per_row(repo, source, data)),
+        ("insert on conflict", lambda repo, source: repo._insert_new(source, data)),
+    ]
+    session = get_session()
+    if session.get_bind().dialect.name == "postgresql":
+        paths.append(("copy", lambda repo, source: Repository(repo.session, bulk_load=True)._insert_new(source, data)))
+
+    print(f"{rows} rows on {session.get_bind().dialect.name}\n")
+    print(f"{'path':<20} {'seconds':>8} {'rows/s':>10}")
+    sources = []
+    try:
+        for name, insert in paths:
+            source = f"benchmark-{name.replace(' ', '-')}"
+            sources.append(source)
+            repo = Repository(get_session())
+            started = time.perf_counter()
+            inserted = insert(repo, source)
+            seconds = time.perf_counter() - started
+            repo.session.close()
+            assert inserted == rows, f"{name} inserted {inserted} of {rows}"
+            print(f"{name:<20} {seconds:>8.2f} {rows / seconds:>10.0f}")
+    finally:
+        session.execute(delete(ContentItem).where(ContentItem.source.in_(sources)))
+        session.commit()
+        session.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark content ingestion")
+    parser.add_argument("--rows", type=int, default=20000)
+    run(parser.parse_args().rows)
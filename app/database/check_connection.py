@@ -3,6 +3,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.database.connection import get_database_info, engine
+from app.database.migrations import MIGRATIONS
 from sqlalchemy import text
 
 if __name__ == "__main__":
@@ -62,18 +63,20 @@ if __name__ == "__main__":
             count = result.scalar()
             print(f"✓ Digests table exists with {count} records")
 
-            result = conn.execute(
-                text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'digests' AND column_name = 'sent_at'
-            """)
-            )
-            has_sent_at = result.fetchone() is not None
-            if has_sent_at:
-                print("✓ sent_at column exists")
+            result = conn.execute(text("""
+                SELECT EXISTS (
+                    SELECT FROM information_schema.tables 
+                    WHERE table_name = 'schema_migrations'
+                )
+            """))
+            version = 0
+            if result.scalar():
+                version = conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+            latest = MIGRATIONS[-1].version
+            if version >= latest:
+                print(f"✓ Schema is at version {version}")
             else:
-                print("⚠ sent_at column does not exist (run migration)")
+                print(f"⚠ Schema is at version {version} of {latest} (run 'python app/database/migrations.py')")
 
     except Exception as e:
         print(f"✗ Connection failed: {e}")
@@ -0,0 +1,156 @@
+"""
+Compressed storage for large text columns.
+
+Values are stored as bytes behind a one-byte codec prefix, so rows written
+with different settings can be read side by side. TEXT_COMPRESSION picks
+the codec for new writes: "none" (default), "zlib" or "zstd". zstd needs the
+optional zstandard package and falls back to zlib without it. Values shorter
+than MIN_COMPRESS_BYTES, or that do not shrink, are stored uncompressed.
+
+Run this file to rewrite existing rows with the current codec:
+    python app/database/compression.py
+"""
+import logging
+import os
+import sys
+import zlib
+from pathlib import Path
+from typing import Optional, Union
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import LargeBinary, bindparam, select, tuple_, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZSTD = b"\x02"
+
+MIN_COMPRESS_BYTES = 256
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def _configured_codec() -> str:
+    codec = os.getenv("TEXT_COMPRESSION", "none").lower()
+    if codec == "zstd" and zstandard is None:
+        logger.warning("TEXT_COMPRESSION=zstd but zstandard is not installed, using zlib")
+        return "zlib"
+    if codec not in ("none", "zlib", "zstd"):
+        logger.warning(f"Unknown TEXT_COMPRESSION {codec!r}, storing text uncompressed")
+        return "none"
+    return codec
+
+
+TEXT_COMPRESSION = _configured_codec()
+
+
+def encode_text(value: str, codec: Optional[str] = None) -> bytes:
+    codec = codec or TEXT_COMPRESSION
+    data = value.encode("utf-8")
+    if codec == "none" or len(data) < MIN_COMPRESS_BYTES:
+        return RAW + data
+    if codec == "zstd":
+        compressed = ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    else:
+        compressed = ZLIB + zlib.compress(data, ZLIB_LEVEL)
+    return compressed if len(compressed) < len(data) + 1 else RAW + data
+
+
+def decode_text(value: Union[bytes, memoryview, str]) -> str:
+    if isinstance(value, str):
+        # Written as TEXT before the column became binary (SQLite keeps these)
+        return value
+    value = bytes(value)
+    prefix, payload = value[:1], value[1:]
+    if prefix == RAW:
+        return payload.decode("utf-8")
+    if prefix == ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if prefix == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Value is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown text codec prefix {prefix!r}")
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored as prefixed, optionally compressed bytes"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, codec: Optional[str] = None):
+        """codec overrides TEXT_COMPRESSION for this column"""
+        super().__init__()
+        self.codec = codec
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return encode_text(value, self.codec)
+
+    def process_result_value(self, value, dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return decode_text(value)
+
+
+def recompress_column(conn: Connection, column, keys: Optional[list] = None, batch_size: int = 500) -> int:
+    """
+    Rewrite every non-null value of a CompressedText column with the current codec.
+
+    keys defaults to the primary key of the column's table.
+    """
+    table = column.table
+    keys = keys or list(table.primary_key.columns)
+    key = tuple_(*keys) if len(keys) > 1 else keys[0]
+    rewritten = 0
+    last_key = None
+    while True:
+        query = select(*keys, column).where(column.isnot(None)).order_by(*keys).limit(batch_size)
+        if last_key is not None:
+            query = query.where(key > (tuple_(*last_key) if len(keys) > 1 else last_key[0]))
+        rows = conn.execute(query).all()
+        if not rows:
+            return rewritten
+        conn.execute(
+            update(table)
+            .where(*[k == bindparam(f"_key_{i}") for i, k in enumerate(keys)])
+            .values({column.name: bindparam("_value", type_=column.type)}),
+            [
+                {**{f"_key_{i}": row[i] for i in range(len(keys))}, "_value": row[len(keys)]}
+                for row in rows
+            ]
+        )
+        rewritten += len(rows)
+        last_key = rows[-1][:len(keys)]
+
+
+def recompress_all(conn: Connection) -> int:
+    from app.database.models import Base
+    rewritten = 0
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            if isinstance(column.type, CompressedText):
+                count = recompress_column(conn, column)
+                logger.info(f"Rewrote {count} values in {table.name}.{column.name} with codec {TEXT_COMPRESSION}")
+                rewritten += count
+    return rewritten
+
+
+if __name__ == "__main__":
+    from app.database.connection import engine
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    with engine.begin() as conn:
+        total = recompress_all(conn)
+    print(f"Rewrote {total} values with codec {TEXT_COMPRESSION}")
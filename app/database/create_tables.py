@@ -5,17 +5,18 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.database.models import (
     Base,
-    YouTubeVideo,
-    OpenAIArticle,
-    AnthropicArticle,
-    XPost,
-    Digest
+    ContentItem,
+    TranscriptFetch,
+    Digest,
+    FeedState,
+    FeedSchedule,
+    SchemaMigration
 )
-from app.database.connection import engine
+from app.database.migrations import run_migrations
 
 if __name__ == "__main__":
     # Import all models so they are registered with Base.metadata
     # This is necessary for SQLAlchemy to discover all tables
     print("Creating database tables...")
-    Base.metadata.create_all(engine)
-    print("Tables created successfully!")
+    applied = run_migrations()
+    print(f"Tables created successfully! ({len(applied)} migrations applied)")
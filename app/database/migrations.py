@@ -0,0 +1,441 @@
+"""
+Versioned schema migrations.
+
+Tables are created from the models first, then every migration newer than
+the latest version in schema_migrations runs in order. Migrations must be
+idempotent, since a fresh database created from the models already has
+most of what they add. Migrations that build indexes run outside a
+transaction so Postgres can use CREATE INDEX CONCURRENTLY without blocking
+writes.
+
+Usage: python app/database/migrations.py
+"""
+import logging
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from pydantic import BaseModel
+from sqlalchemy import String, column, inspect, select, table, text, tuple_
+from sqlalchemy.engine import Connection, Engine
+
+from app.database.compression import TEXT_COMPRESSION, CompressedText, recompress_column
+from app.database.connection import engine as default_engine
+from app.database.search import index_content
+from app.database.models import Base
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_advisory_lock, so concurrent runners apply migrations once
+MIGRATION_LOCK_KEY = 4821370915
+
+TRANSCRIPT_UNAVAILABLE_MARKER = "__UNAVAILABLE__"
+
+
+class Migration(BaseModel):
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+    transactional: bool = True
+
+
+# The per-source tables that content_items replaced. Migrations written
+# before it skip them when they do not exist, as in a fresh database.
+LEGACY_TABLES = {
+    "youtube": "youtube_videos",
+    "openai": "openai_articles",
+    "anthropic": "anthropic_articles",
+    "x": "x_posts",
+}
+
+
+def _has_table(conn: Connection, name: str) -> bool:
+    """True for real tables only, not the views that replaced the legacy tables"""
+    return name in inspect(conn).get_table_names()
+
+
+def _has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+def _create_index(conn: Connection, name: str, table: str, columns: str, where: str = None,
+                  using: str = None) -> None:
+    concurrently = ""
+    if conn.dialect.name == "postgresql":
+        concurrently = "CONCURRENTLY "
+        # An interrupted concurrent build leaves an invalid index behind that
+        # IF NOT EXISTS would keep forever
+        invalid = conn.execute(text("""
+            SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = :name AND NOT i.indisvalid
+        """), {"name": name}).scalar()
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    using_clause = f" USING {using}" if using else ""
+    where_clause = f" WHERE {where}" if where else ""
+    conn.execute(text(
+        f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table}{using_clause} ({columns}){where_clause}"
+    ))
+
+
+def add_x_markdown_column(conn: Connection) -> None:
+    if _has_table(conn, "x_posts") and not _has_column(conn, "x_posts", "markdown"):
+        conn.execute(text("ALTER TABLE x_posts ADD COLUMN markdown TEXT"))
+
+
+def migrate_unavailable_markers(conn: Connection) -> None:
+    """Replace the __UNAVAILABLE__ transcript marker with negative entries that are due straight away"""
+    if not _has_table(conn, "youtube_videos"):
+        return
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    conn.execute(text("""
+        INSERT INTO transcript_fetches (video_id, status, attempts, last_attempt_at, retry_after)
+        SELECT video_id, 'unavailable', 1, :now, :now
+        FROM youtube_videos
+        WHERE transcript = :marker
+          AND video_id NOT IN (SELECT video_id FROM transcript_fetches)
+    """), {"now": now, "marker": TRANSCRIPT_UNAVAILABLE_MARKER})
+    conn.execute(
+        text("UPDATE youtube_videos SET transcript = NULL WHERE transcript = :marker"),
+        {"marker": TRANSCRIPT_UNAVAILABLE_MARKER}
+    )
+
+
+def _column_type(conn: Connection, table: str, column: str) -> Optional[str]:
+    return conn.execute(text("""
+        SELECT data_type
+        FROM information_schema.columns
+        WHERE table_name = :table AND column_name = :column
+    """), {"table": table, "column": column}).scalar()
+
+
+def _to_timestamptz(conn: Connection, table: str, column: str) -> None:
+    """Convert a naive UTC timestamp column to TIMESTAMPTZ (Postgres only)"""
+    if _column_type(conn, table, column) == "timestamp without time zone":
+        conn.execute(text(
+            f"ALTER TABLE {table} ALTER COLUMN {column} "
+            f"TYPE TIMESTAMPTZ USING {column} AT TIME ZONE 'UTC'"
+        ))
+
+
+def migrate_timezone_columns(conn: Connection) -> None:
+    """Store digest and article timestamps as TIMESTAMPTZ; existing values are naive UTC"""
+    if conn.dialect.name != "postgresql":
+        # SQLite has no column types to change
+        return
+    columns = [
+        ("digests", "created_at"),
+        ("youtube_videos", "published_at"),
+        ("openai_articles", "published_at"),
+        ("anthropic_articles", "published_at"),
+        ("x_posts", "published_at"),
+    ]
+    for table, column in columns:
+        _to_timestamptz(conn, table, column)
+
+
+def add_time_indexes(conn: Connection) -> None:
+    _create_index(conn, "ix_digests_created_at", "digests", "created_at")
+    for name in LEGACY_TABLES.values():
+        if _has_table(conn, name):
+            _create_index(conn, f"ix_{name}_published_at", name, "published_at")
+            _create_index(conn, f"ix_{name}_created_at", name, "created_at")
+
+
+def add_pending_work_indexes(conn: Connection) -> None:
+    # Only rows still waiting for work are indexed, so these stay small
+    if _has_table(conn, "youtube_videos"):
+        _create_index(conn, "ix_youtube_videos_pending_transcript", "youtube_videos", "published_at",
+                      where="transcript IS NULL")
+    for name in ("anthropic_articles", "x_posts"):
+        if _has_table(conn, name):
+            _create_index(conn, f"ix_{name}_pending_markdown", name, "published_at", where="markdown IS NULL")
+
+
+def compress_body_columns(conn: Connection) -> None:
+    """Store transcripts and markdown as CompressedText, compressing existing rows if enabled"""
+    legacy_columns = [("youtube_videos", "video_id", "transcript"), ("anthropic_articles", "guid", "markdown"),
+                      ("x_posts", "guid", "markdown")]
+    for table_name, key_name, column_name in legacy_columns:
+        if not _has_table(conn, table_name):
+            continue
+        if conn.dialect.name == "postgresql":
+            data_type = conn.execute(text("""
+                SELECT data_type
+                FROM information_schema.columns
+                WHERE table_name = :table AND column_name = :column
+            """), {"table": table_name, "column": column_name}).scalar()
+            if data_type == "text":
+                # Existing values become uncompressed entries with the raw prefix
+                conn.execute(text(
+                    f"ALTER TABLE {table_name} ALTER COLUMN {column_name} "
+                    f"TYPE BYTEA USING '\\x00'::bytea || convert_to({column_name}, 'UTF8')"
+                ))
+        # SQLite reads old TEXT values as they are, so only compression needs a rewrite
+        if TEXT_COMPRESSION != "none":
+            legacy = table(table_name, column(key_name, String), column(column_name, CompressedText()))
+            recompress_column(conn, legacy.c[column_name], keys=[legacy.c[key_name]])
+
+
+def _legacy_view_columns(postgres: bool) -> Dict[str, str]:
+    """The columns of the view that stands in for each source's legacy table"""
+    def extra(field: str) -> str:
+        return f"extras ->> '{field}'" if postgres else f"json_extract(extras, '$.{field}')"
+
+    return {
+        "youtube": f"external_id AS video_id, title, url, {extra('channel_id')} AS channel_id, "
+                   f"published_at, description, body AS transcript, created_at",
+        "openai": f"external_id AS guid, title, url, description, published_at, "
+                  f"{extra('category')} AS category, created_at",
+        "anthropic": f"external_id AS guid, title, url, description, published_at, "
+                     f"{extra('category')} AS category, body AS markdown, created_at",
+        "x": f"external_id AS guid, title, url, description, published_at, {extra('author')} AS author, "
+             f"{extra('category')} AS category, body AS markdown, created_at",
+    }
+
+
+def unify_content_items(conn: Connection) -> None:
+    """
+    Copy the per-source tables into content_items, keep them as legacy_<name>
+    and replace them with views of the same shape for ad hoc SQL. Bodies are
+    copied as stored, so view transcript and markdown columns hold
+    CompressedText bytes.
+    """
+    postgres = conn.dialect.name == "postgresql"
+
+    def json_object(*fields: str) -> str:
+        pairs = ", ".join(f"'{f}', {f}" for f in fields)
+        return f"jsonb_build_object({pairs})" if postgres else f"json_object({pairs})"
+
+    copies = {
+        "youtube": ("video_id", "transcript", json_object("channel_id")),
+        "openai": ("guid", "NULL", json_object("category")),
+        "anthropic": ("guid", "markdown", json_object("category")),
+        "x": ("guid", "markdown", json_object("author", "category")),
+    }
+    views = _legacy_view_columns(postgres)
+
+    for source, name in LEGACY_TABLES.items():
+        if _has_table(conn, name):
+            key, body, extras = copies[source]
+            # WHERE true keeps SQLite from reading ON CONFLICT as part of the SELECT
+            conn.execute(text(f"""
+                INSERT INTO content_items (source, external_id, title, url, published_at, description, body, extras, created_at)
+                SELECT '{source}', {key}, title, url, published_at, description, {body}, {extras}, created_at
+                FROM {name}
+                WHERE true
+                ON CONFLICT DO NOTHING
+            """))
+            conn.execute(text(f"ALTER TABLE {name} RENAME TO legacy_{name}"))
+        if name not in inspect(conn).get_view_names():
+            conn.execute(text(f"CREATE VIEW {name} AS SELECT {views[source]} FROM content_items WHERE source = '{source}'"))
+
+
+def add_content_item_indexes(conn: Connection) -> None:
+    _create_index(conn, "ix_content_items_source_published_at", "content_items", "source, published_at")
+    _create_index(conn, "ix_content_items_created_at", "content_items", "created_at")
+    # Items still waiting for a transcript or markdown
+    _create_index(conn, "ix_content_items_pending_body", "content_items", "source, published_at",
+                  where="body IS NULL")
+
+
+def _create_digest_search(conn: Connection) -> None:
+    """
+    digests_fts holds its own copy of each digest's title and summary, keyed
+    by digest id. digests has a TEXT primary key, so its rowid is not stable
+    (VACUUM may renumber it) and cannot link the two tables.
+    """
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS digests_fts USING fts5(id UNINDEXED, title, summary)"
+    ))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS digests_fts_insert AFTER INSERT ON digests BEGIN
+            INSERT INTO digests_fts (id, title, summary) VALUES (new.id, new.title, new.summary);
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS digests_fts_delete AFTER DELETE ON digests BEGIN
+            DELETE FROM digests_fts WHERE id = old.id;
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS digests_fts_update AFTER UPDATE ON digests BEGIN
+            DELETE FROM digests_fts WHERE id = old.id;
+            INSERT INTO digests_fts (id, title, summary) VALUES (new.id, new.title, new.summary);
+        END
+    """))
+    conn.execute(text("DELETE FROM digests_fts"))
+    conn.execute(text("INSERT INTO digests_fts (id, title, summary) SELECT id, title, summary FROM digests"))
+
+
+def add_full_text_search(conn: Connection) -> None:
+    """
+    tsvector columns on Postgres and FTS5 tables on SQLite for digests and
+    content items; see app/database/search.py. Existing bodies are indexed
+    here, new ones by the repository as they are written.
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("""
+            ALTER TABLE digests ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(summary, '')), 'B')
+            ) STORED
+        """))
+        conn.execute(text("""
+            ALTER TABLE content_items ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'C') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'D')
+            ) STORED
+        """))
+        conn.execute(text("ALTER TABLE content_items ADD COLUMN IF NOT EXISTS body_vector tsvector"))
+    elif conn.dialect.name == "sqlite":
+        _create_digest_search(conn)
+        # Bodies may be compressed, so this one is filled from Python
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS content_items_fts "
+            "USING fts5(source UNINDEXED, external_id UNINDEXED, title, description, body)"
+        ))
+    else:
+        return
+
+    items = table("content_items", column("source", String), column("external_id", String),
+                  column("body", CompressedText()))
+    keys = tuple_(items.c.source, items.c.external_id)
+    last_key = None
+    while True:
+        query = select(items).order_by(items.c.source, items.c.external_id).limit(500)
+        if conn.dialect.name == "postgresql":
+            # Titles and descriptions are covered by the generated column
+            query = query.where(items.c.body.isnot(None))
+        if last_key is not None:
+            query = query.where(keys > tuple_(*last_key))
+        rows = conn.execute(query).all()
+        if not rows:
+            break
+        for source in {row.source for row in rows}:
+            index_content(conn, source, {row.external_id: row.body for row in rows if row.source == source})
+        last_key = (rows[-1].source, rows[-1].external_id)
+
+
+def add_search_indexes(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        # FTS5 tables are their own index
+        return
+    _create_index(conn, "ix_digests_search_vector", "digests", "search_vector", using="gin")
+    _create_index(conn, "ix_content_items_search_vector", "content_items", "search_vector", using="gin")
+    _create_index(conn, "ix_content_items_body_vector", "content_items", "body_vector", using="gin")
+
+
+def key_digest_search_by_id(conn: Connection) -> None:
+    """Replace the digests_fts index that was linked to digests by rowid"""
+    if conn.dialect.name != "sqlite" or not _has_table(conn, "digests_fts"):
+        return
+    if _has_column(conn, "digests_fts", "id"):
+        return
+    for trigger in ("digests_fts_insert", "digests_fts_delete", "digests_fts_update"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    conn.execute(text("DROP TABLE digests_fts"))
+    _create_digest_search(conn)
+
+
+def migrate_content_item_created_at(conn: Connection) -> None:
+    """Store content_items.created_at as TIMESTAMPTZ like the other timestamps"""
+    if conn.dialect.name != "postgresql":
+        return
+    if _column_type(conn, "content_items", "created_at") != "timestamp without time zone":
+        return
+    # The legacy views select created_at, which blocks changing its type
+    views = [name for name in LEGACY_TABLES.values() if name in inspect(conn).get_view_names()]
+    for name in views:
+        conn.execute(text(f"DROP VIEW {name}"))
+    _to_timestamptz(conn, "content_items", "created_at")
+    columns = _legacy_view_columns(postgres=True)
+    for source, name in LEGACY_TABLES.items():
+        if name in views:
+            conn.execute(text(f"CREATE VIEW {name} AS SELECT {columns[source]} FROM content_items WHERE source = '{source}'"))
+
+
+def add_job_backoff(conn: Connection) -> None:
+    if not _has_column(conn, "jobs", "not_before"):
+        column_type = "TIMESTAMP WITH TIME ZONE" if conn.dialect.name == "postgresql" else "DATETIME"
+        conn.execute(text(f"ALTER TABLE jobs ADD COLUMN not_before {column_type}"))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(version=1, name="add_x_markdown_column", upgrade=add_x_markdown_column),
+    Migration(version=2, name="migrate_unavailable_markers", upgrade=migrate_unavailable_markers),
+    Migration(version=3, name="migrate_timezone_columns", upgrade=migrate_timezone_columns),
+    Migration(version=4, name="add_time_indexes", upgrade=add_time_indexes, transactional=False),
+    Migration(version=5, name="add_pending_work_indexes", upgrade=add_pending_work_indexes, transactional=False),
+    Migration(version=6, name="compress_body_columns", upgrade=compress_body_columns),
+    Migration(version=7, name="unify_content_items", upgrade=unify_content_items),
+    Migration(version=8, name="add_content_item_indexes", upgrade=add_content_item_indexes, transactional=False),
+    Migration(version=9, name="add_full_text_search", upgrade=add_full_text_search),
+    Migration(version=10, name="add_search_indexes", upgrade=add_search_indexes, transactional=False),
+    Migration(version=11, name="add_job_backoff", upgrade=add_job_backoff),
+    Migration(version=12, name="key_digest_search_by_id", upgrade=key_digest_search_by_id),
+    Migration(version=13, name="migrate_content_item_created_at", upgrade=migrate_content_item_created_at),
+]
+
+
+def current_version(conn: Connection) -> int:
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def pending_migrations(conn: Connection) -> List[Migration]:
+    version = current_version(conn)
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+        {"version": migration.version, "name": migration.name, "applied_at": datetime.utcnow()}
+    )
+
+
+def run_migrations(engine: Engine = None) -> List[str]:
+    """Create missing tables and apply pending migrations, returning the names applied"""
+    engine = engine or default_engine
+    Base.metadata.create_all(engine)
+
+    applied = []
+    # Autocommit, so an idle transaction here cannot block CREATE INDEX CONCURRENTLY
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if lock_conn.dialect.name == "postgresql":
+            lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            # Read after taking the lock, in case another runner just finished
+            with engine.connect() as conn:
+                pending = pending_migrations(conn)
+
+            for migration in pending:
+                logger.info(f"Applying migration {migration.version}: {migration.name}")
+                if migration.transactional:
+                    with engine.begin() as conn:
+                        migration.upgrade(conn)
+                        _record(conn, migration)
+                else:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        migration.upgrade(conn)
+                        _record(conn, migration)
+                applied.append(migration.name)
+        finally:
+            if lock_conn.dialect.name == "postgresql":
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+    return applied
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    names = run_migrations()
+    if names:
+        print(f"Applied {len(names)} migrations: {', '.join(names)}")
+    else:
+        print("Database schema is up to date")
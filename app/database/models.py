@@ -1,61 +1,66 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import Column, String, DateTime, Text
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import Column, String, DateTime, Text, Integer, Float, JSON, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import declarative_base, deferred, synonym
+from .compression import CompressedText
 
 Base = declarative_base()
 
+# Large text bodies are only loaded when accessed, all of a row's at once
+BODY_GROUP = "body"
 
-class YouTubeVideo(Base):
-    __tablename__ = "youtube_videos"
-    
-    video_id = Column(String, primary_key=True)
-    title = Column(String, nullable=False)
-    url = Column(String, nullable=False)
-    channel_id = Column(String, nullable=False)
-    published_at = Column(DateTime, nullable=False)
-    description = Column(Text)
-    transcript = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
 
+class ContentItem(Base):
+    """
+    Scraped items from every source, keyed by (source, external_id).
 
-class OpenAIArticle(Base):
-    __tablename__ = "openai_articles"
-    
-    guid = Column(String, primary_key=True)
+    source is "youtube", "openai", "anthropic" or "x", matching the digest
+    article_type. body holds the YouTube transcript or the page markdown, and
+    extras the source-specific fields (channel_id, category, author). The
+    primary key leads with source so the table can be list-partitioned by
+    source on Postgres.
+    """
+    __tablename__ = "content_items"
+
+    source = Column(String, primary_key=True)
+    external_id = Column(String, primary_key=True)
     title = Column(String, nullable=False)
     url = Column(String, nullable=False)
-    description = Column(Text)
-    published_at = Column(DateTime, nullable=False)
-    category = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    published_at = Column(DateTime(timezone=True), nullable=False)
+    description = deferred(Column(Text), group=BODY_GROUP)
+    body = deferred(Column(CompressedText, nullable=True), group=BODY_GROUP)
+    extras = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False, default=dict)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
+    # Names from the per-source tables this replaced
+    video_id = synonym("external_id")
+    guid = synonym("external_id")
+    transcript = synonym("body")
+    markdown = synonym("body")
 
-class AnthropicArticle(Base):
-    __tablename__ = "anthropic_articles"
-    
-    guid = Column(String, primary_key=True)
-    title = Column(String, nullable=False)
-    url = Column(String, nullable=False)
-    description = Column(Text)
-    published_at = Column(DateTime, nullable=False)
-    category = Column(String, nullable=True)
-    markdown = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    @property
+    def channel_id(self) -> str:
+        return (self.extras or {}).get("channel_id", "")
+
+    @property
+    def category(self) -> Optional[str]:
+        return (self.extras or {}).get("category")
 
+    @property
+    def author(self) -> str:
+        return (self.extras or {}).get("author", "")
 
-class XPost(Base):
-    __tablename__ = "x_posts"
+
+class TranscriptFetch(Base):
+    __tablename__ = "transcript_fetches"
     
-    guid = Column(String, primary_key=True)
-    title = Column(String, nullable=False)
-    url = Column(String, nullable=False)
-    description = Column(Text)
-    published_at = Column(DateTime, nullable=False)
-    author = Column(String, nullable=False)
-    category = Column(String, nullable=True)
-    markdown = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    video_id = Column(String, primary_key=True)
+    status = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_attempt_at = Column(DateTime, nullable=False)
+    retry_after = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
 
 
 class Digest(Base):
@@ -67,4 +72,92 @@ class Digest(Base):
     url = Column(String, nullable=False)
     title = Column(String, nullable=False)
     summary = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+
+
+class FeedState(Base):
+    __tablename__ = "feed_states"
+
+    url = Column(String, primary_key=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    content_hash = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class FeedSchedule(Base):
+    __tablename__ = "feed_schedules"
+
+    url = Column(String, primary_key=True)
+    source = Column(String, nullable=False)
+    last_polled_at = Column(DateTime, nullable=True)
+    next_poll_at = Column(DateTime, nullable=True)
+    last_published_at = Column(DateTime, nullable=True)
+    mean_interval_seconds = Column(Float, nullable=True)
+    polls = Column(Integer, nullable=False, default=0)
+    items_seen = Column(Integer, nullable=False, default=0)
+
+
+class Job(Base):
+    """
+    One unit of work for a processing stage, such as the markdown of one
+    article. Workers claim pending jobs, or running ones whose lease has
+    expired, and hold them until lease_expires_at unless they renew it. A job
+    released after a failed attempt is not claimed again before not_before.
+    state is "pending", "running", "done" or "failed".
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        UniqueConstraint("stage", "key", name="uq_jobs_stage_key"),
+        Index("ix_jobs_stage_state", "stage", "state", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    stage = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    state = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    not_before = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class PipelineRun(Base):
+    """One run of the daily pipeline. status is "running", "succeeded" or "failed"."""
+    __tablename__ = "pipeline_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    status = Column(String, nullable=False, default="running")
+    params = Column(JSON, nullable=False, default=dict)
+    started_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class StageRun(Base):
+    """
+    The outcome of one stage of a pipeline run. output holds what the stage
+    returned, so a resumed run can skip the stage and still use its result.
+    """
+    __tablename__ = "stage_runs"
+    __table_args__ = (UniqueConstraint("pipeline_run_id", "name", name="uq_stage_runs_run_name"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    pipeline_run_id = Column(Integer, ForeignKey("pipeline_runs.id"), nullable=False)
+    name = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    output = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
@@ -1,253 +1,405 @@
+import io
+import json
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any, Tuple
+from sqlalchemy import String, and_, bindparam, case, exists, func, literal, or_, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from .models import YouTubeVideo, OpenAIArticle, AnthropicArticle, XPost, Digest
+from .models import ContentItem, Digest, FeedState, FeedSchedule, Job, PipelineRun, StageRun, TranscriptFetch
 from .connection import get_session
+from .search import fts5_query, has_search_tables, index_content
+
+
+# Column order of COPY rows, matching content_items
+COPY_COLUMNS = ["source", "external_id", "title", "url", "published_at", "description", "body", "extras", "created_at"]
+
+
+def _copy_field(value: Any) -> str:
+    """Format one value for COPY ... FROM STDIN in text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bytes):
+        value = "\\x" + value.hex()
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, dict):
+        value = json.dumps(value)
+    else:
+        value = str(value)
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
 
 
 class Repository:
-    def __init__(self, session: Optional[Session] = None):
+    def __init__(self, session: Optional[Session] = None, bulk_load: bool = False):
+        """
+        With bulk_load, bulk_create_* stream rows into a staging table with
+        COPY FROM STDIN and merge them in one statement on Postgres. Meant for
+        backfills; other databases use the regular batched inserts.
+        """
         self.session = session or get_session()
+        self.bulk_load = bulk_load
+        self._search_indexed: Optional[bool] = None
+    
+    def _get_item(self, source: str, external_id: str) -> Optional[ContentItem]:
+        return self.session.get(ContentItem, (source, external_id))
     
     def create_youtube_video(self, video_id: str, title: str, url: str, channel_id: str, 
-                            published_at: datetime, description: str = "", transcript: Optional[str] = None) -> Optional[YouTubeVideo]:
-        existing = self.session.query(YouTubeVideo).filter_by(video_id=video_id).first()
-        if existing:
-            return None
-        video = YouTubeVideo(
-            video_id=video_id,
-            title=title,
-            url=url,
-            channel_id=channel_id,
-            published_at=published_at,
-            description=description,
-            transcript=transcript
-        )
-        self.session.add(video)
-        self.session.commit()
-        return video
+                            published_at: datetime, description: str = "", transcript: Optional[str] = None) -> Optional[ContentItem]:
+        created = self.bulk_create_youtube_videos([{
+            "video_id": video_id,
+            "title": title,
+            "url": url,
+            "channel_id": channel_id,
+            "published_at": published_at,
+            "description": description,
+            "transcript": transcript
+        }])
+        return self._get_item("youtube", video_id) if created else None
     
     def create_openai_article(self, guid: str, title: str, url: str, published_at: datetime,
-                              description: str = "", category: Optional[str] = None) -> Optional[OpenAIArticle]:
-        existing = self.session.query(OpenAIArticle).filter_by(guid=guid).first()
-        if existing:
-            return None
-        article = OpenAIArticle(
-            guid=guid,
-            title=title,
-            url=url,
-            published_at=published_at,
-            description=description,
-            category=category
-        )
-        self.session.add(article)
-        self.session.commit()
-        return article
+                              description: str = "", category: Optional[str] = None) -> Optional[ContentItem]:
+        created = self.bulk_create_openai_articles([{
+            "guid": guid,
+            "title": title,
+            "url": url,
+            "published_at": published_at,
+            "description": description,
+            "category": category
+        }])
+        return self._get_item("openai", guid) if created else None
     
     def create_anthropic_article(self, guid: str, title: str, url: str, published_at: datetime,
-                                description: str = "", category: Optional[str] = None) -> Optional[AnthropicArticle]:
-        existing = self.session.query(AnthropicArticle).filter_by(guid=guid).first()
-        if existing:
-            return None
-        article = AnthropicArticle(
-            guid=guid,
-            title=title,
-            url=url,
-            published_at=published_at,
-            description=description,
-            category=category
-        )
-        self.session.add(article)
+                                description: str = "", category: Optional[str] = None) -> Optional[ContentItem]:
+        created = self.bulk_create_anthropic_articles([{
+            "guid": guid,
+            "title": title,
+            "url": url,
+            "published_at": published_at,
+            "description": description,
+            "category": category
+        }])
+        return self._get_item("anthropic", guid) if created else None
+    
+    def _insert_new(self, source: str, rows: List[dict], chunk_size: int = 500) -> int:
+        """
+        Insert content items that are not stored yet, returning how many were inserted.
+
+        Uses INSERT ... ON CONFLICT DO NOTHING RETURNING in chunks, so a batch
+        costs one statement per chunk instead of a lookup per row. Dialects
+        without it fall back to one SELECT of the existing keys per chunk.
+        """
+        # Feeds can repeat an item; keep the first one like the old per-row lookup
+        by_key: Dict[Any, dict] = {}
+        for row in rows:
+            by_key.setdefault(row["external_id"], {**row, "source": source})
+        unique_rows = list(by_key.values())
+        if not unique_rows:
+            return 0
+
+        dialect = self.session.get_bind().dialect
+        if self.bulk_load and dialect.name == "postgresql":
+            return self._copy_new(source, unique_rows)
+
+        inserted = 0
+        for i in range(0, len(unique_rows), chunk_size):
+            chunk = unique_rows[i:i + chunk_size]
+            if dialect.name in ("postgresql", "sqlite") and dialect.insert_returning:
+                insert = postgresql_insert if dialect.name == "postgresql" else sqlite_insert
+                stmt = insert(ContentItem).values(chunk).on_conflict_do_nothing(
+                    index_elements=["source", "external_id"]
+                ).returning(ContentItem.external_id)
+                new_keys = self.session.scalars(stmt).all()
+            else:
+                keys = [row["external_id"] for row in chunk]
+                existing = set(self.session.scalars(select(ContentItem.external_id).where(
+                    ContentItem.source == source, ContentItem.external_id.in_(keys)
+                )))
+                new_rows = [ContentItem(**row) for row in chunk if row["external_id"] not in existing]
+                self.session.add_all(new_rows)
+                self.session.flush()
+                new_keys = [row.external_id for row in new_rows]
+            self._index(source, {key: by_key[key].get("body") for key in new_keys})
+            inserted += len(new_keys)
         self.session.commit()
-        return article
+        return inserted
     
-    def bulk_create_youtube_videos(self, videos: List[dict]) -> int:
-        new_videos = []
-        for v in videos:
-            existing = self.session.query(YouTubeVideo).filter_by(video_id=v["video_id"]).first()
-            if not existing:
-                new_videos.append(YouTubeVideo(
-                    video_id=v["video_id"],
-                    title=v["title"],
-                    url=v["url"],
-                    channel_id=v.get("channel_id", ""),
-                    published_at=v["published_at"],
-                    description=v.get("description", ""),
-                    transcript=v.get("transcript")
-                ))
-        if new_videos:
-            self.session.add_all(new_videos)
+    def _copy_new(self, source: str, rows: List[dict], chunk_size: int = 5000) -> int:
+        """
+        COPY rows into a temporary staging table, then insert the ones not
+        stored yet with INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+        """
+        now = datetime.now(timezone.utc)
+        body_type = ContentItem.__table__.c.body.type
+        columns = ", ".join(COPY_COLUMNS)
+        try:
+            cursor = self.session.connection().connection.cursor()
+            # Cleared on commit; no constraints, so loading it never conflicts
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS content_items_staging "
+                "(LIKE content_items INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            for i in range(0, len(rows), chunk_size):
+                buffer = io.StringIO()
+                for row in rows[i:i + chunk_size]:
+                    values = {**row, "created_at": now}
+                    # Encode bodies the way CompressedText would on insert
+                    values["body"] = body_type.process_bind_param(values.get("body"), None)
+                    buffer.write("\t".join(_copy_field(values.get(c)) for c in COPY_COLUMNS) + "\n")
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY content_items_staging ({columns}) FROM STDIN", buffer)
+            cursor.execute(
+                f"INSERT INTO content_items ({columns}) "
+                f"SELECT {columns} FROM content_items_staging ON CONFLICT DO NOTHING "
+                f"RETURNING external_id"
+            )
+            new_keys = {key for (key,) in cursor.fetchall()}
+            self._index(source, {row["external_id"]: row.get("body") for row in rows if row["external_id"] in new_keys})
             self.session.commit()
-        return len(new_videos)
+        except Exception:
+            self.session.rollback()
+            raise
+        return len(new_keys)
+    
+    def bulk_create_youtube_videos(self, videos: List[dict]) -> int:
+        return self._insert_new("youtube", [
+            {
+                "external_id": v["video_id"],
+                "title": v["title"],
+                "url": v["url"],
+                "published_at": v["published_at"],
+                "description": v.get("description", ""),
+                "body": v.get("transcript"),
+                "extras": {"channel_id": v.get("channel_id", "")}
+            }
+            for v in videos
+        ])
     
     def bulk_create_openai_articles(self, articles: List[dict]) -> int:
-        new_articles = []
-        for a in articles:
-            existing = self.session.query(OpenAIArticle).filter_by(guid=a["guid"]).first()
-            if not existing:
-                new_articles.append(OpenAIArticle(
-                    guid=a["guid"],
-                    title=a["title"],
-                    url=a["url"],
-                    published_at=a["published_at"],
-                    description=a.get("description", ""),
-                    category=a.get("category")
-                ))
-        if new_articles:
-            self.session.add_all(new_articles)
-            self.session.commit()
-        return len(new_articles)
+        return self._insert_new("openai", [
+            {
+                "external_id": a["guid"],
+                "title": a["title"],
+                "url": a["url"],
+                "published_at": a["published_at"],
+                "description": a.get("description", ""),
+                "extras": {"category": a.get("category")}
+            }
+            for a in articles
+        ])
     
     def bulk_create_anthropic_articles(self, articles: List[dict]) -> int:
-        new_articles = []
-        for a in articles:
-            existing = self.session.query(AnthropicArticle).filter_by(guid=a["guid"]).first()
-            if not existing:
-                new_articles.append(AnthropicArticle(
-                    guid=a["guid"],
-                    title=a["title"],
-                    url=a["url"],
-                    published_at=a["published_at"],
-                    description=a.get("description", ""),
-                    category=a.get("category")
-                ))
-        if new_articles:
-            self.session.add_all(new_articles)
-            self.session.commit()
-        return len(new_articles)
+        return self._insert_new("anthropic", [
+            {
+                "external_id": a["guid"],
+                "title": a["title"],
+                "url": a["url"],
+                "published_at": a["published_at"],
+                "description": a.get("description", ""),
+                "extras": {"category": a.get("category")}
+            }
+            for a in articles
+        ])
     
     def bulk_create_x_posts(self, posts: List[dict]) -> int:
-        new_posts = []
-        for p in posts:
-            existing = self.session.query(XPost).filter_by(guid=p["guid"]).first()
-            if not existing:
-                new_posts.append(XPost(
-                    guid=p["guid"],
-                    title=p["title"],
-                    url=p["url"],
-                    published_at=p["published_at"],
-                    description=p.get("description", ""),
-                    author=p.get("author", ""),
-                    category=p.get("category")
-                ))
-        if new_posts:
-            self.session.add_all(new_posts)
+        return self._insert_new("x", [
+            {
+                "external_id": p["guid"],
+                "title": p["title"],
+                "url": p["url"],
+                "published_at": p["published_at"],
+                "description": p.get("description", ""),
+                "extras": {"author": p.get("author", ""), "category": p.get("category")}
+            }
+            for p in posts
+        ])
+    
+    def _index(self, source: str, bodies: Dict[str, Optional[str]]) -> None:
+        """Keep the full-text index in step with written items, once its migration has run"""
+        if self._search_indexed is None:
+            self._search_indexed = has_search_tables(self.session.connection())
+        if self._search_indexed:
+            index_content(self.session.connection(), source, bodies)
+    
+    def _without_body(self, source: str, key: str, keys: Optional[List[str]] = None):
+        """key, title and url of a source's items that have no body yet, newest first"""
+        query = select(ContentItem.external_id.label(key), ContentItem.title, ContentItem.url).where(
+            ContentItem.source == source, ContentItem.body.is_(None)
+        ).order_by(ContentItem.published_at.desc())
+        if keys is not None:
+            query = query.where(ContentItem.external_id.in_(keys))
+        return query
+    
+    def _bulk_update_body(self, source: str, updates: Dict[str, str]) -> int:
+        """
+        Set the body of every item in updates, returning how many exist to update.
+
+        Runs one SELECT of the matching keys and one executemany UPDATE by
+        primary key, then commits once.
+        """
+        if not updates:
+            return 0
+        try:
+            found = list(self.session.scalars(select(ContentItem.external_id).where(
+                ContentItem.source == source, ContentItem.external_id.in_(list(updates))
+            )))
+            if found:
+                self.session.execute(update(ContentItem), [
+                    {"source": source, "external_id": k, "body": updates[k]} for k in found
+                ])
+                self._index(source, {k: updates[k] for k in found})
             self.session.commit()
-        return len(new_posts)
+        except Exception:
+            self.session.rollback()
+            raise
+        return len(found)
     
-    def get_anthropic_articles_without_markdown(self, limit: Optional[int] = None) -> List[AnthropicArticle]:
-        query = self.session.query(AnthropicArticle).filter(AnthropicArticle.markdown.is_(None))
+    def get_anthropic_articles_without_markdown(self, limit: Optional[int] = None,
+                                                       keys: Optional[List[str]] = None) -> List[Row]:
+        """guid, title and url of articles without markdown; rows are not loaded into the session"""
+        query = self._without_body("anthropic", "guid", keys)
         if limit:
             query = query.limit(limit)
-        return query.all()
+        return self.session.execute(query).all()
     
     def update_anthropic_article_markdown(self, guid: str, markdown: str) -> bool:
-        article = self.session.query(AnthropicArticle).filter_by(guid=guid).first()
-        if article:
-            article.markdown = markdown
-            self.session.commit()
-            return True
-        return False
+        return self.update_anthropic_articles_markdown({guid: markdown}) == 1
+    
+    def update_anthropic_articles_markdown(self, updates: Dict[str, str]) -> int:
+        return self._bulk_update_body("anthropic", updates)
     
-    def get_x_posts_without_markdown(self, limit: Optional[int] = None) -> List[XPost]:
-        query = self.session.query(XPost).filter(XPost.markdown.is_(None))
+    def get_x_posts_without_markdown(self, limit: Optional[int] = None,
+                                            keys: Optional[List[str]] = None) -> List[Row]:
+        """guid, title and url of posts without markdown; rows are not loaded into the session"""
+        query = self._without_body("x", "guid", keys)
         if limit:
             query = query.limit(limit)
-        return query.all()
+        return self.session.execute(query).all()
     
     def update_x_post_markdown(self, guid: str, markdown: str) -> bool:
-        post = self.session.query(XPost).filter_by(guid=guid).first()
-        if post:
-            post.markdown = markdown
-            self.session.commit()
-            return True
-        return False
+        return self.update_x_posts_markdown({guid: markdown}) == 1
     
-    def get_youtube_videos_without_transcript(self, limit: Optional[int] = None) -> List[YouTubeVideo]:
-        query = self.session.query(YouTubeVideo).filter(YouTubeVideo.transcript.is_(None))
+    def update_x_posts_markdown(self, updates: Dict[str, str]) -> int:
+        return self._bulk_update_body("x", updates)
+    
+    def get_youtube_videos_without_transcript(self, limit: Optional[int] = None,
+                                              keys: Optional[List[str]] = None) -> List[Row]:
+        """
+        video_id, title and url of videos without a transcript, skipping those
+        whose last failed fetch is still backing off
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        query = self._without_body("youtube", "video_id", keys).outerjoin(
+            TranscriptFetch, TranscriptFetch.video_id == ContentItem.external_id
+        ).where(
+            or_(TranscriptFetch.retry_after.is_(None), TranscriptFetch.retry_after <= now)
+        )
         if limit:
             query = query.limit(limit)
-        return query.all()
+        return self.session.execute(query).all()
     
     def update_youtube_video_transcript(self, video_id: str, transcript: str) -> bool:
-        video = self.session.query(YouTubeVideo).filter_by(video_id=video_id).first()
-        if video:
-            video.transcript = transcript
-            self.session.commit()
-            return True
-        return False
+        return self.update_youtube_videos_transcript({video_id: transcript}) == 1
     
-    def get_articles_without_digest(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        articles = []
-        seen_ids = set()
-        
-        digests = self.session.query(Digest).all()
-        for d in digests:
-            seen_ids.add(f"{d.article_type}:{d.article_id}")
-        
-        youtube_videos = self.session.query(YouTubeVideo).filter(
-            YouTubeVideo.transcript.isnot(None),
-            YouTubeVideo.transcript != "__UNAVAILABLE__"
-        ).all()
-        for video in youtube_videos:
-            key = f"youtube:{video.video_id}"
-            if key not in seen_ids:
-                articles.append({
-                    "type": "youtube",
-                    "id": video.video_id,
-                    "title": video.title,
-                    "url": video.url,
-                    "content": video.transcript or video.description or "",
-                    "published_at": video.published_at
-                })
-        
-        openai_articles = self.session.query(OpenAIArticle).all()
-        for article in openai_articles:
-            key = f"openai:{article.guid}"
-            if key not in seen_ids:
-                articles.append({
-                    "type": "openai",
-                    "id": article.guid,
-                    "title": article.title,
-                    "url": article.url,
-                    "content": article.description or "",
-                    "published_at": article.published_at
-                })
-        
-        anthropic_articles = self.session.query(AnthropicArticle).filter(
-            AnthropicArticle.markdown.isnot(None)
-        ).all()
-        for article in anthropic_articles:
-            key = f"anthropic:{article.guid}"
-            if key not in seen_ids:
-                articles.append({
-                    "type": "anthropic",
-                    "id": article.guid,
-                    "title": article.title,
-                    "url": article.url,
-                    "content": article.markdown or article.description or "",
-                    "published_at": article.published_at
-                })
-        
-        x_posts = self.session.query(XPost).filter(
-            XPost.markdown.isnot(None)
-        ).all()
-        for post in x_posts:
-            key = f"x:{post.guid}"
-            if key not in seen_ids:
-                articles.append({
-                    "type": "x",
-                    "id": post.guid,
-                    "title": post.title,
-                    "url": post.url,
-                    "content": post.markdown or post.description or "",
-                    "published_at": post.published_at
-                })
-        
+    def update_youtube_videos_transcript(self, updates: Dict[str, str]) -> int:
+        return self._bulk_update_body("youtube", updates)
+    
+    def record_transcript_fetch(self, video_id: str, status: str, retry_delay: Optional[timedelta] = None,
+                                error: Optional[str] = None) -> TranscriptFetch:
+        """status is "available", "unavailable" (no captions) or "error" (retried sooner)"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        fetch = self.session.query(TranscriptFetch).filter_by(video_id=video_id).first()
+        if not fetch:
+            fetch = TranscriptFetch(video_id=video_id, attempts=0)
+            self.session.add(fetch)
+        fetch.attempts += 1
+        fetch.last_attempt_at = now
+        fetch.status = status
+        fetch.retry_after = now + retry_delay if status != "available" and retry_delay else None
+        fetch.last_error = error
+        self.session.commit()
+        return fetch
+    
+    def record_transcripts_available(self, video_ids: List[str]) -> None:
+        """Positive entries for many videos at once, with a single commit"""
+        if not video_ids:
+            return
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        fetches = {
+            f.video_id: f
+            for f in self.session.query(TranscriptFetch).filter(TranscriptFetch.video_id.in_(video_ids))
+        }
+        for video_id in video_ids:
+            fetch = fetches.get(video_id)
+            if not fetch:
+                fetch = TranscriptFetch(video_id=video_id, attempts=0)
+                self.session.add(fetch)
+            fetch.attempts += 1
+            fetch.last_attempt_at = now
+            fetch.status = "available"
+            fetch.retry_after = None
+            fetch.last_error = None
+        self.session.commit()
+    
+    def get_transcript_fetch(self, video_id: str) -> Optional[TranscriptFetch]:
+        return self.session.query(TranscriptFetch).filter_by(video_id=video_id).first()
+    
+    def _undigested(self, keys: Optional[List[str]] = None):
+        """
+        Items without a digest; YouTube, Anthropic and X items also need their
+        body. keys limits them to the given digest ids.
+        """
+        # Digest ids are "<source>:<external_id>", so this is a primary key lookup per row
+        digest_id = ContentItem.source + literal(":", String) + ContentItem.external_id
+        query = select(
+            ContentItem.source, ContentItem.external_id, ContentItem.title, ContentItem.url,
+            ContentItem.body, ContentItem.description, ContentItem.published_at
+        ).where(
+            or_(ContentItem.source == "openai", ContentItem.body.isnot(None)),
+            ~exists().where(Digest.id == digest_id)
+        )
+        if keys is not None:
+            query = query.where(tuple_(ContentItem.source, ContentItem.external_id).in_(
+                [tuple(key.split(":", 1)) for key in keys]
+            ))
+        return query
+
+    def iter_articles_without_digest(self, limit: Optional[int] = None, batch_size: int = 100,
+                                     keys: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield articles that have no digest yet, newest first.
+
+        Filtering and limit run in the database and rows are streamed in
+        batches of batch_size. Rows are read on a separate session, so the
+        caller can keep committing digests on this one while iterating.
+        keys limits the articles to the given digest ids.
+        """
+        query = self._undigested(keys).order_by(ContentItem.published_at.desc())
         if limit:
-            articles = articles[:limit]
-        
-        return articles
+            query = query.limit(limit)
+        # On this session's engine, which need not be the default one
+        session = Session(bind=self.session.get_bind())
+        try:
+            for row in session.execute(query.execution_options(yield_per=batch_size)):
+                yield {
+                    "type": row.source,
+                    "id": row.external_id,
+                    "title": row.title,
+                    "url": row.url,
+                    # body may be compressed, so this fallback cannot be done in SQL
+                    "content": row.body or row.description or "",
+                    "published_at": row.published_at
+                }
+        finally:
+            session.close()
+
+    def count_articles_without_digest(self, limit: Optional[int] = None) -> int:
+        total = self.session.scalar(select(func.count()).select_from(self._undigested().subquery()))
+        return min(total, limit) if limit else total
+
+    def get_articles_without_digest(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return list(self.iter_articles_without_digest(limit=limit))
     
     def create_digest(self, article_type: str, article_id: str, url: str, title: str, summary: str, published_at: Optional[datetime] = None) -> Optional[Digest]:
         digest_id = f"{article_type}:{article_id}"
@@ -275,31 +427,311 @@ class Repository:
         self.session.commit()
         return digest
     
-    def get_recent_digests(self, hours: int = 24) -> List[Dict[str, Any]]:
+    def get_recent_digests(self, hours: int = 24, limit: Optional[int] = None,
+                           before: Optional[Tuple[datetime, str]] = None) -> List[Dict[str, Any]]:
+        """
+        Digests created in the last hours, newest first.
+
+        To page through them, pass limit and then the (created_at, id) of the
+        last digest on the previous page as before.
+        """
         cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-        # Handle both timezone-aware and naive datetimes from database
-        digests = self.session.query(Digest).order_by(Digest.created_at.desc()).all()
-        
-        # Filter in Python to handle timezone-aware/naive datetime comparisons
-        recent_digests = []
-        for d in digests:
-            created_at = d.created_at
-            # Convert naive datetime to timezone-aware if needed
-            if created_at and created_at.tzinfo is None:
-                created_at = created_at.replace(tzinfo=timezone.utc)
-            # Compare with cutoff_time
-            if created_at and created_at >= cutoff_time:
-                recent_digests.append(d)
+        query = self.session.query(Digest).filter(Digest.created_at >= cutoff_time)
+        if before:
+            query = query.filter(tuple_(Digest.created_at, Digest.id) < tuple_(*before))
+        query = query.order_by(Digest.created_at.desc(), Digest.id.desc())
+        if limit:
+            query = query.limit(limit)
         
+        return [self._digest_dict(d) for d in query]
+    
+    def search_digests(self, query: str, since: Optional[datetime] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Digests matching query, best match first, with their rank.
+
+        Matches the digest title and summary, and also the title, description
+        and body of the item it summarises, which count for less. On Postgres
+        query takes websearch syntax ("quoted phrases", OR, -excluded); on
+        SQLite every word has to match.
+        """
+        if not query.strip():
+            return []
+        dialect = self.session.get_bind().dialect.name
+        if dialect == "postgresql":
+            sql = """
+                WITH q AS (SELECT websearch_to_tsquery('english', :query) AS query),
+                matches AS (
+                    SELECT d.id FROM digests d, q WHERE d.search_vector @@ q.query
+                    UNION
+                    SELECT c.source || ':' || c.external_id FROM content_items c, q
+                    WHERE c.search_vector @@ q.query OR c.body_vector @@ q.query
+                )
+                SELECT d.id, d.article_type, d.article_id, d.url, d.title, d.summary, d.created_at,
+                       ts_rank(d.search_vector, q.query)
+                       + 0.5 * coalesce(ts_rank(c.search_vector || coalesce(c.body_vector, ''::tsvector), q.query), 0)
+                       AS rank
+                FROM matches m
+                JOIN digests d ON d.id = m.id
+                LEFT JOIN content_items c ON c.source = d.article_type AND c.external_id = d.article_id
+                CROSS JOIN q
+            """
+            params = {"query": query}
+        elif dialect == "sqlite":
+            # bm25() is lower for better matches
+            sql = """
+                WITH matches AS (
+                    SELECT d.id, -bm25(digests_fts) AS rank
+                    FROM digests_fts JOIN digests d ON d.id = digests_fts.id
+                    WHERE digests_fts MATCH :query
+                    UNION ALL
+                    SELECT source || ':' || external_id, -0.5 * bm25(content_items_fts)
+                    FROM content_items_fts
+                    WHERE content_items_fts MATCH :query
+                )
+                SELECT d.id, d.article_type, d.article_id, d.url, d.title, d.summary, d.created_at,
+                       SUM(m.rank) AS rank
+                FROM matches m
+                JOIN digests d ON d.id = m.id
+            """
+            params = {"query": fts5_query(query)}
+        else:
+            pattern = f"%{query}%"
+            rows = self.session.query(Digest).filter(
+                or_(Digest.title.ilike(pattern), Digest.summary.ilike(pattern))
+            )
+            if since:
+                rows = rows.filter(Digest.created_at >= since)
+            rows = rows.order_by(Digest.created_at.desc()).limit(limit)
+            return [{**self._digest_dict(d), "rank": 1.0} for d in rows]
+
+        if since:
+            sql += " WHERE d.created_at >= :since"
+            params["since"] = since
+        if dialect == "sqlite":
+            sql += " GROUP BY d.id"
+        sql += " ORDER BY rank DESC, d.created_at DESC LIMIT :limit"
+        params["limit"] = limit
+        stmt = text(sql)
+        if since:
+            stmt = stmt.bindparams(bindparam("since", type_=Digest.created_at.type))
+        stmt = stmt.columns(created_at=Digest.created_at.type)
         return [
-            {
-                "id": d.id,
-                "article_type": d.article_type,
-                "article_id": d.article_id,
-                "url": d.url,
-                "title": d.title,
-                "summary": d.summary,
-                "created_at": d.created_at
-            }
-            for d in recent_digests
-        ]
\ No newline at end of file
+            {**self._digest_dict(row), "rank": float(row.rank)}
+            for row in self.session.execute(stmt, params)
+        ]
+    
+    def _digest_dict(self, d) -> Dict[str, Any]:
+        return {
+            "id": d.id,
+            "article_type": d.article_type,
+            "article_id": d.article_id,
+            "url": d.url,
+            "title": d.title,
+            "summary": d.summary,
+            # SQLite hands TIMESTAMPTZ values back naive; they are stored as UTC
+            "created_at": d.created_at.replace(tzinfo=timezone.utc) if d.created_at and d.created_at.tzinfo is None else d.created_at
+        }
+    
+    def enqueue_jobs(self, stage: str, keys: List[str], chunk_size: int = 500) -> int:
+        """
+        Add pending jobs for keys, returning how many were added or reopened.
+
+        Done jobs are reopened, since their item is pending again. Failed
+        jobs stay failed until reset_failed_jobs, so an item that keeps
+        failing is not retried by every worker that starts; running jobs are
+        left to their worker.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return 0
+        dialect = self.session.get_bind().dialect.name
+        insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        now = datetime.now(timezone.utc)
+        count = 0
+        try:
+            for i in range(0, len(keys), chunk_size):
+                stmt = insert(Job).values([
+                    {"stage": stage, "key": key, "state": "pending", "attempts": 0, "created_at": now, "updated_at": now}
+                    for key in keys[i:i + chunk_size]
+                ])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["stage", "key"],
+                    set_={"state": "pending", "attempts": 0, "worker_id": None, "lease_expires_at": None,
+                          "not_before": None, "last_error": None, "updated_at": now},
+                    where=Job.state == "done"
+                )
+                count += self.session.execute(stmt).rowcount
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return count
+    
+    def reset_failed_jobs(self, stage: str, keys: Optional[List[str]] = None) -> int:
+        """Make failed jobs pending again with fresh attempts; all of the stage's unless keys are given"""
+        jobs = Job.__table__
+        query = update(jobs).where(jobs.c.stage == stage, jobs.c.state == "failed")
+        if keys is not None:
+            query = query.where(jobs.c.key.in_(keys))
+        try:
+            count = self.session.execute(query.values(
+                state="pending", attempts=0, not_before=None, updated_at=datetime.now(timezone.utc)
+            )).rowcount
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return count
+    
+    def claim_jobs(self, stage: str, worker_id: str, limit: int, lease: timedelta,
+                   max_attempts: int = 3) -> List[str]:
+        """
+        Claim up to limit jobs for worker_id and return their keys.
+
+        Claims pending jobs past their not_before and running ones whose
+        lease expired, as their worker stopped without finishing them; those
+        out of attempts are failed instead. On Postgres, FOR UPDATE SKIP LOCKED lets concurrent
+        workers claim different jobs without waiting on each other. SQLite
+        runs one writer at a time, so the single UPDATE is enough there.
+        """
+        now = datetime.now(timezone.utc)
+        jobs = Job.__table__
+        expired = and_(jobs.c.state == "running", jobs.c.lease_expires_at < now)
+        try:
+            self.session.execute(
+                update(jobs)
+                .where(jobs.c.stage == stage, expired, jobs.c.attempts >= max_attempts)
+                .values(state="failed", worker_id=None, lease_expires_at=None,
+                        last_error="Lease expired on last attempt", updated_at=now)
+            )
+            claimable = (
+                select(jobs.c.id)
+                .where(jobs.c.stage == stage, jobs.c.attempts < max_attempts, or_(
+                    and_(jobs.c.state == "pending",
+                         or_(jobs.c.not_before.is_(None), jobs.c.not_before <= now)),
+                    expired
+                ))
+                .order_by(jobs.c.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            keys = self.session.scalars(
+                update(jobs)
+                .where(jobs.c.id.in_(claimable.scalar_subquery()))
+                .values(state="running", worker_id=worker_id, attempts=jobs.c.attempts + 1,
+                        lease_expires_at=now + lease, not_before=None, updated_at=now)
+                .returning(jobs.c.key)
+            ).all()
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return list(keys)
+    
+    def _update_claimed(self, stage: str, worker_id: str, keys: List[str], values: Dict[str, Any]) -> int:
+        """Update jobs worker_id still holds; jobs another worker took over are left alone"""
+        if not keys:
+            return 0
+        jobs = Job.__table__
+        try:
+            count = self.session.execute(
+                update(jobs)
+                .where(jobs.c.stage == stage, jobs.c.key.in_(keys), jobs.c.worker_id == worker_id,
+                       jobs.c.state == "running")
+                .values({**values, "updated_at": datetime.now(timezone.utc)})
+            ).rowcount
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return count
+    
+    def renew_job_leases(self, stage: str, worker_id: str, keys: List[str], lease: timedelta) -> int:
+        return self._update_claimed(stage, worker_id, keys, {"lease_expires_at": datetime.now(timezone.utc) + lease})
+    
+    def complete_jobs(self, stage: str, worker_id: str, keys: List[str]) -> int:
+        return self._update_claimed(stage, worker_id, keys, {"state": "done", "lease_expires_at": None})
+    
+    def fail_jobs(self, stage: str, worker_id: str, keys: List[str], max_attempts: int = 3,
+                  error: Optional[str] = None, retry_delay: timedelta = timedelta(minutes=1)) -> int:
+        """
+        Release jobs for another attempt, or fail them once out of attempts.
+        A released job waits retry_delay after its first attempt, doubling
+        with each attempt after that.
+        """
+        jobs = Job.__table__
+        now = datetime.now(timezone.utc)
+        return self._update_claimed(stage, worker_id, keys, {
+            "state": case((jobs.c.attempts >= max_attempts, "failed"), else_="pending"),
+            "worker_id": None,
+            "lease_expires_at": None,
+            "not_before": case(
+                *[(jobs.c.attempts == n, now + retry_delay * 2 ** (n - 1)) for n in range(1, max_attempts)],
+                else_=None
+            ) if max_attempts > 1 else None,
+            "last_error": error
+        })
+    
+    def get_feed_states(self, urls: List[str]) -> Dict[str, FeedState]:
+        if not urls:
+            return {}
+        states = self.session.query(FeedState).filter(FeedState.url.in_(urls)).all()
+        return {state.url: state for state in states}
+    
+    def save_feed_states(self, states: List[dict]) -> int:
+        for s in states:
+            self.session.merge(FeedState(
+                url=s["url"],
+                etag=s.get("etag"),
+                last_modified=s.get("last_modified"),
+                content_hash=s.get("content_hash"),
+                updated_at=datetime.now(timezone.utc)
+            ))
+        if states:
+            self.session.commit()
+        return len(states)
+    
+    def get_feed_schedules(self) -> Dict[str, FeedSchedule]:
+        return {schedule.url: schedule for schedule in self.session.query(FeedSchedule).all()}
+    
+    def save_feed_schedule(self, schedule: dict) -> FeedSchedule:
+        saved = self.session.merge(FeedSchedule(**schedule))
+        self.session.commit()
+        return saved
+    
+    def create_pipeline_run(self, params: Dict[str, Any]) -> PipelineRun:
+        run = PipelineRun(status="running", params=params)
+        self.session.add(run)
+        self.session.commit()
+        return run
+    
+    def get_latest_pipeline_run(self) -> Optional[PipelineRun]:
+        return self.session.query(PipelineRun).order_by(PipelineRun.id.desc()).first()
+    
+    def get_completed_stages(self, pipeline_run_id: int) -> Dict[str, Any]:
+        """Outputs of the stages of a run that succeeded, by stage name"""
+        stages = self.session.query(StageRun).filter_by(pipeline_run_id=pipeline_run_id, status="succeeded")
+        return {stage.name: stage.output for stage in stages}
+    
+    def save_stage_run(self, pipeline_run_id: int, name: str, status: str, started_at: Optional[datetime] = None,
+                       finished_at: Optional[datetime] = None, output: Any = None,
+                       error: Optional[str] = None) -> StageRun:
+        """Record a stage's outcome, replacing the one from an earlier attempt of the same run"""
+        stage = self.session.query(StageRun).filter_by(pipeline_run_id=pipeline_run_id, name=name).first()
+        if not stage:
+            stage = StageRun(pipeline_run_id=pipeline_run_id, name=name)
+            self.session.add(stage)
+        stage.status = status
+        stage.started_at = started_at
+        stage.finished_at = finished_at
+        stage.duration_seconds = (finished_at - started_at).total_seconds() if started_at and finished_at else None
+        stage.output = output
+        stage.error = error
+        self.session.commit()
+        return stage
+    
+    def finish_pipeline_run(self, pipeline_run_id: int, status: str) -> None:
+        run = self.session.get(PipelineRun, pipeline_run_id)
+        run.status = status
+        run.finished_at = datetime.now(timezone.utc)
+        self.session.commit()
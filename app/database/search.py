@@ -0,0 +1,62 @@
+"""
+Full-text search over digests and the content they summarise.
+
+On Postgres, digests and content_items get generated tsvector columns for
+their titles, summaries and descriptions, indexed with GIN. Bodies can be
+compressed, so content_items.body_vector is filled in by the repository
+whenever a body is written. On SQLite the same data goes into FTS5 tables:
+digests_fts is kept in sync by triggers and content_items_fts by the
+repository. Other databases get no index and search falls back to LIKE.
+"""
+from typing import Dict, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+# Postgres rejects tsvectors over 1MB; the start of a transcript is plenty
+MAX_INDEXED_CHARS = 200_000
+
+
+def has_search_tables(conn: Connection) -> bool:
+    """True once the full-text search migration has run"""
+    if conn.dialect.name == "postgresql":
+        return any(c["name"] == "body_vector" for c in inspect(conn).get_columns("content_items"))
+    if conn.dialect.name == "sqlite":
+        return "content_items_fts" in inspect(conn).get_table_names()
+    return False
+
+
+def index_content(conn: Connection, source: str, bodies: Dict[str, Optional[str]]) -> None:
+    """Update the search index for content items, given their (possibly missing) bodies"""
+    if not bodies:
+        return
+    if conn.dialect.name == "postgresql":
+        with_body = [
+            {"source": source, "external_id": key, "body": body[:MAX_INDEXED_CHARS]}
+            for key, body in bodies.items() if body
+        ]
+        if with_body:
+            conn.execute(text("""
+                UPDATE content_items
+                SET body_vector = setweight(to_tsvector('english', :body), 'D')
+                WHERE source = :source AND external_id = :external_id
+            """), with_body)
+    elif conn.dialect.name == "sqlite":
+        rows = [
+            {"source": source, "external_id": key, "body": (body or "")[:MAX_INDEXED_CHARS]}
+            for key, body in bodies.items()
+        ]
+        conn.execute(text(
+            "DELETE FROM content_items_fts WHERE source = :source AND external_id = :external_id"
+        ), rows)
+        conn.execute(text("""
+            INSERT INTO content_items_fts (source, external_id, title, description, body)
+            SELECT source, external_id, title, coalesce(description, ''), :body
+            FROM content_items
+            WHERE source = :source AND external_id = :external_id
+        """), rows)
+
+
+def fts5_query(query: str) -> str:
+    """Quote each term so user input cannot break FTS5 query syntax"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
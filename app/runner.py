@@ -10,83 +10,101 @@ from app.scrapers.youtube import YouTubeScraper, ChannelVideo
 from app.scrapers.openai import OpenAIScraper, OpenAIArticle
 from app.scrapers.anthropic import AnthropicScraper, AnthropicArticle
 from app.scrapers.x import XScraper, XPost
+from app.scrapers.feed_cache import FeedCache
 from app.database.repository import Repository
 
 
-def run_scrapers(hours: int = 24) -> dict:
-    youtube_scraper = YouTubeScraper()
-    openai_scraper = OpenAIScraper()
-    anthropic_scraper = AnthropicScraper()
-    x_scraper = XScraper()
-    repo = Repository()
-    
-    youtube_videos = []
-    video_dicts = []
-    for channel_id in YOUTUBE_CHANNELS:
-        videos = youtube_scraper.get_latest_videos(channel_id, hours=hours)
-        youtube_videos.extend(videos)
-        video_dicts.extend([
-            {
-                "video_id": v.video_id,
-                "title": v.title,
-                "url": v.url,
-                "channel_id": channel_id,
-                "published_at": v.published_at,
-                "description": v.description,
-                "transcript": v.transcript
-            }
-            for v in videos
-        ])
+def save_youtube_videos(repo: Repository, channel_id: str, videos: List[ChannelVideo]) -> int:
+    if not videos:
+        return 0
+    return repo.bulk_create_youtube_videos([
+        {
+            "video_id": v.video_id,
+            "title": v.title,
+            "url": v.url,
+            "channel_id": channel_id,
+            "published_at": v.published_at,
+            "description": v.description,
+            "transcript": v.transcript
+        }
+        for v in videos
+    ])
+
+
+def _article_dicts(articles: list) -> List[dict]:
+    return [
+        {
+            "guid": a.guid,
+            "title": a.title,
+            "url": a.url,
+            "published_at": a.published_at,
+            "description": a.description,
+            "category": a.category
+        }
+        for a in articles
+    ]
+
+
+def save_openai_articles(repo: Repository, articles: List[OpenAIArticle]) -> int:
+    if not articles:
+        return 0
+    return repo.bulk_create_openai_articles(_article_dicts(articles))
+
+
+def save_anthropic_articles(repo: Repository, articles: List[AnthropicArticle]) -> int:
+    if not articles:
+        return 0
+    return repo.bulk_create_anthropic_articles(_article_dicts(articles))
+
+
+def save_x_posts(repo: Repository, posts: List[XPost]) -> int:
+    if not posts:
+        return 0
+    return repo.bulk_create_x_posts([
+        {
+            "guid": p.guid,
+            "title": p.title,
+            "url": p.url,
+            "published_at": p.published_at,
+            "description": p.description,
+            "author": p.author,
+            "category": p.category
+        }
+        for p in posts
+    ])
+
+
+def run_scrapers(hours: int = 24, use_feed_cache: bool = True, bulk_load: bool = False) -> dict:
+    """
+    Scrape all sources and store new items.
+
+    With use_feed_cache, feeds that have not changed since the last run are
+    skipped. Disable it for backfills with a wider hours window, since items
+    in unchanged feeds are assumed to be stored already. bulk_load stores
+    items with COPY on Postgres, which pays off for large backfills.
+    """
+    repo = Repository(bulk_load=bulk_load)
+    feed_cache = FeedCache(repo) if use_feed_cache else None
+    youtube_scraper = YouTubeScraper(feed_cache=feed_cache)
+    openai_scraper = OpenAIScraper(feed_cache=feed_cache)
+    anthropic_scraper = AnthropicScraper(feed_cache=feed_cache)
+    x_scraper = XScraper(feed_cache=feed_cache)
     
+    channel_videos = youtube_scraper.get_latest_videos_for_channels(YOUTUBE_CHANNELS, hours=hours)
+    youtube_videos = [v for videos in channel_videos.values() for v in videos]
     openai_articles = openai_scraper.get_articles(hours=hours)
     anthropic_articles = anthropic_scraper.get_articles(hours=hours)
     x_posts = x_scraper.get_posts(hours=hours)
     
-    if video_dicts:
-        repo.bulk_create_youtube_videos(video_dicts)
+    for channel_id, videos in channel_videos.items():
+        save_youtube_videos(repo, channel_id, videos)
+    save_openai_articles(repo, openai_articles)
+    save_anthropic_articles(repo, anthropic_articles)
+    save_x_posts(repo, x_posts)
     
-    if openai_articles:
-        article_dicts = [
-            {
-                "guid": a.guid,
-                "title": a.title,
-                "url": a.url,
-                "published_at": a.published_at,
-                "description": a.description,
-                "category": a.category
-            }
-            for a in openai_articles
-        ]
-        repo.bulk_create_openai_articles(article_dicts)
-    
-    if anthropic_articles:
-        article_dicts = [
-            {
-                "guid": a.guid,
-                "title": a.title,
-                "url": a.url,
-                "published_at": a.published_at,
-                "description": a.description,
-                "category": a.category
-            }
-            for a in anthropic_articles
-        ]
-        repo.bulk_create_anthropic_articles(article_dicts)
-    
-    if x_posts:
-        post_dicts = [
-            {
-                "guid": p.guid,
-                "title": p.title,
-                "url": p.url,
-                "published_at": p.published_at,
-                "description": p.description,
-                "author": p.author,
-                "category": p.category
-            }
-            for p in x_posts
-        ]
-        repo.bulk_create_x_posts(post_dicts)
+    # Only remember feed validators once everything they cover is stored
+    if feed_cache:
+        feed_cache.commit()
     
     return {
         "youtube": youtube_videos,
@@ -95,9 +113,12 @@ def run_scrapers(hours: int = 24) -> dict:
         "x": x_posts,
     }
 
-
 if __name__ == "__main__":
-    results = run_scrapers(hours=50)
+    # python app/runner.py [hours] [--backfill]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    backfill = "--backfill" in sys.argv
+    hours = int(args[0]) if args else 50
+    results = run_scrapers(hours=hours, use_feed_cache=not backfill, bulk_load=backfill)
     print(f"YouTube videos: {len(results['youtube'])}")
     print(f"OpenAI articles: {len(results['openai'])}")
     print(f"Anthropic articles: {len(results['anthropic'])}")
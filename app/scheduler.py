@@ -0,0 +1,233 @@
+import heapq
+import logging
+import math
+import signal
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.config import YOUTUBE_CHANNELS
+from app.database.repository import Repository
+from app.runner import save_youtube_videos, save_openai_articles, save_anthropic_articles, save_x_posts
+from app.scrapers.anthropic import AnthropicScraper
+from app.scrapers.feed_cache import FeedCache
+from app.scrapers.openai import OpenAIScraper
+from app.scrapers.x import XScraper
+from app.scrapers.youtube import YouTubeScraper
+
+logger = logging.getLogger(__name__)
+
+# Takes a look-back window in hours, stores what it finds and returns the
+# publish times of the items in the feed
+PollFunction = Callable[[int], List[datetime]]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class FeedScheduler:
+    """
+    Polls each feed on its own schedule, based on how often it publishes.
+
+    Every feed keeps an exponentially weighted mean of the gap between its
+    posts and is polled again after poll_fraction of that gap, clamped to
+    [min_interval, max_interval]. A feed that has gone quiet for longer than
+    its usual gap is polled less often. Due feeds are kept in a priority
+    queue ordered by next poll time, and their state is stored in the
+    feed_schedules table so a restarted process keeps its history.
+    """
+
+    def __init__(self, repo: Optional[Repository] = None,
+                 min_interval: timedelta = timedelta(minutes=15),
+                 max_interval: timedelta = timedelta(hours=24),
+                 default_interval: timedelta = timedelta(hours=1),
+                 smoothing: float = 0.3, poll_fraction: float = 0.5, first_poll_hours: int = 24):
+        self.repo = repo or Repository()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = default_interval
+        self.smoothing = smoothing
+        self.poll_fraction = poll_fraction
+        self.first_poll_hours = first_poll_hours
+        self._feeds: Dict[str, Tuple[str, PollFunction]] = {}
+        self._states: Dict[str, dict] = {}
+        self._queue: List[Tuple[datetime, str]] = []
+
+    def add_feed(self, source: str, url: str, poll: PollFunction) -> None:
+        self._feeds[url] = (source, poll)
+
+    def start(self) -> None:
+        """Load stored schedules and queue every registered feed"""
+        stored = self.repo.get_feed_schedules()
+        now = _utcnow()
+        self._queue = []
+        for url, (source, _) in self._feeds.items():
+            schedule = stored.get(url)
+            self._states[url] = {
+                "url": url,
+                "source": source,
+                "last_polled_at": schedule.last_polled_at if schedule else None,
+                "next_poll_at": schedule.next_poll_at if schedule else None,
+                "last_published_at": schedule.last_published_at if schedule else None,
+                "mean_interval_seconds": schedule.mean_interval_seconds if schedule else None,
+                "polls": schedule.polls if schedule else 0,
+                "items_seen": schedule.items_seen if schedule else 0,
+            }
+            heapq.heappush(self._queue, (self._states[url]["next_poll_at"] or now, url))
+        logger.info(f"Scheduled {len(self._queue)} feeds")
+
+    def next_due(self) -> Optional[datetime]:
+        return self._queue[0][0] if self._queue else None
+
+    def run_pending(self, now: Optional[datetime] = None) -> int:
+        """Poll every feed that is due, returning how many were polled"""
+        now = now or _utcnow()
+        polled = 0
+        while self._queue and self._queue[0][0] <= now:
+            _, url = heapq.heappop(self._queue)
+            self._poll(url)
+            heapq.heappush(self._queue, (self._states[url]["next_poll_at"], url))
+            polled += 1
+        return polled
+
+    def run_forever(self, stop_event: Optional[threading.Event] = None, max_sleep: float = 60.0) -> None:
+        stop_event = stop_event or threading.Event()
+        self.start()
+        while not stop_event.is_set():
+            self.run_pending()
+            next_due = self.next_due()
+            wait = max_sleep if next_due is None else (next_due - _utcnow()).total_seconds()
+            stop_event.wait(min(max_sleep, max(1.0, wait)))
+
+    def _poll(self, url: str) -> None:
+        source, poll = self._feeds[url]
+        state = self._states[url]
+        now = _utcnow()
+
+        if state["last_polled_at"]:
+            # Look back to the previous poll, with an hour of overlap
+            hours = math.ceil((now - state["last_polled_at"]).total_seconds() / 3600) + 1
+            hours = min(hours, 24 * 7)
+        else:
+            hours = self.first_poll_hours
+
+        try:
+            published = [_naive_utc(p) for p in poll(hours)]
+        except Exception as e:
+            logger.error(f"Polling {source} feed {url} failed: {e}")
+            published = []
+
+        new_items = sorted(p for p in published if not state["last_published_at"] or p > state["last_published_at"])
+        previous = state["last_published_at"]
+        for published_at in new_items:
+            if previous is not None:
+                gap = max(0.0, (published_at - previous).total_seconds())
+                mean = state["mean_interval_seconds"]
+                state["mean_interval_seconds"] = gap if mean is None else (1 - self.smoothing) * mean + self.smoothing * gap
+            previous = published_at
+
+        state["last_published_at"] = previous
+        state["last_polled_at"] = now
+        state["polls"] += 1
+        state["items_seen"] += len(new_items)
+        interval = self._next_interval(state, now)
+        state["next_poll_at"] = now + interval
+
+        logger.info(f"Polled {source} feed {url}: {len(new_items)} new items, next poll in {interval}")
+        self.repo.save_feed_schedule(state)
+
+    def _next_interval(self, state: dict, now: datetime) -> timedelta:
+        mean = state["mean_interval_seconds"]
+        if mean is None:
+            # Not enough posts yet to measure a gap
+            expected = self.default_interval.total_seconds() / self.poll_fraction
+        else:
+            expected = mean
+        if state["last_published_at"]:
+            silence = (now - state["last_published_at"]).total_seconds()
+            expected = max(expected, silence)
+        interval = timedelta(seconds=expected * self.poll_fraction)
+        return max(self.min_interval, min(self.max_interval, interval))
+
+
+def build_scheduler(repo: Optional[Repository] = None) -> FeedScheduler:
+    """Register every configured feed and YouTube channel with a scheduler"""
+    repo = repo or Repository()
+    feed_cache = FeedCache(repo)
+    scheduler = FeedScheduler(repo)
+
+    youtube_scraper = YouTubeScraper(feed_cache=feed_cache)
+    openai_scraper = OpenAIScraper(feed_cache=feed_cache)
+    anthropic_scraper = AnthropicScraper(feed_cache=feed_cache)
+    x_scraper = XScraper(feed_cache=feed_cache)
+
+    def published_times(items: list) -> List[datetime]:
+        # Items are stored by now, so the feed's validators can be kept
+        feed_cache.commit()
+        return [item.published_at for item in items]
+
+    def youtube_poll(channel_id: str) -> PollFunction:
+        def poll(hours: int) -> List[datetime]:
+            videos = youtube_scraper.get_latest_videos(channel_id, hours=hours)
+            save_youtube_videos(repo, channel_id, videos)
+            return published_times(videos)
+        return poll
+
+    def openai_poll(url: str) -> PollFunction:
+        def poll(hours: int) -> List[datetime]:
+            articles = openai_scraper.get_articles(hours=hours, rss_urls=[url])
+            save_openai_articles(repo, articles)
+            return published_times(articles)
+        return poll
+
+    def anthropic_poll(url: str) -> PollFunction:
+        def poll(hours: int) -> List[datetime]:
+            articles = anthropic_scraper.get_articles(hours=hours, rss_urls=[url])
+            save_anthropic_articles(repo, articles)
+            return published_times(articles)
+        return poll
+
+    def x_poll(url: str) -> PollFunction:
+        def poll(hours: int) -> List[datetime]:
+            posts = x_scraper.get_posts(hours=hours, rss_urls=[url])
+            save_x_posts(repo, posts)
+            return published_times(posts)
+        return poll
+
+    for channel_id in YOUTUBE_CHANNELS:
+        scheduler.add_feed("youtube", youtube_scraper._get_rss_url(channel_id), youtube_poll(channel_id))
+    for url in openai_scraper.rss_urls:
+        scheduler.add_feed("openai", url, openai_poll(url))
+    for url in anthropic_scraper.rss_urls:
+        scheduler.add_feed("anthropic", url, anthropic_poll(url))
+    for url in x_scraper.rss_urls:
+        scheduler.add_feed("x", url, x_poll(url))
+
+    return scheduler
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    build_scheduler().run_forever(stop)
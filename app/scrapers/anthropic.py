@@ -1,6 +1,5 @@
-from typing import List, Optional
-import requests
-from html_to_markdown import convert
+from typing import Dict, List, Optional
+from app.config import ANTHROPIC_FEEDS
 from .base import BaseScraper, Article
 
 
@@ -11,30 +10,18 @@ class AnthropicArticle(Article):
 class AnthropicScraper(BaseScraper):
     @property
     def rss_urls(self) -> List[str]:
-        return [
-            "https://raw.githubusercontent.com/Olshansk/rss-feeds/main/feeds/feed_anthropic_news.xml",
-            "https://raw.githubusercontent.com/Olshansk/rss-feeds/main/feeds/feed_anthropic_research.xml",
-            "https://raw.githubusercontent.com/Olshansk/rss-feeds/main/feeds/feed_anthropic_engineering.xml",
-        ]
+        return list(ANTHROPIC_FEEDS)
 
-    def get_articles(self, hours: int = 24) -> List[AnthropicArticle]:
+    @property
+    def feed_labels(self) -> Dict[str, str]:
+        return ANTHROPIC_FEEDS
+
+    def get_articles(self, hours: int = 24, rss_urls: Optional[List[str]] = None) -> List[AnthropicArticle]:
         return [
             AnthropicArticle(**article.model_dump())
-            for article in super().get_articles(hours)
+            for article in super().get_articles(hours, rss_urls)
         ]
 
-    def url_to_markdown(self, url: str) -> Optional[str]:
-        try:
-            response = requests.get(
-                url, headers={"User-Agent": "Mozilla/5.0"}, timeout=30
-            )
-            response.raise_for_status()
-            html = response.text
-            markdown = convert(html)
-            return markdown
-        except Exception:
-            return None
-
 
 if __name__ == "__main__":
     scraper = AnthropicScraper()
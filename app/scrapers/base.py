@@ -1,8 +1,20 @@
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+import logging
+import threading
 import feedparser
+from html_to_markdown import convert
+from lxml import etree
 from pydantic import BaseModel
+from .feed_cache import FeedCache, fetch_feed
+from .feed_parser import iter_feed_entries
+from .fetcher import get_fetcher
+from .page_cache import PageCache
+
+logger = logging.getLogger(__name__)
 
 
 class Article(BaseModel):
@@ -12,69 +24,257 @@ class Article(BaseModel):
     guid: str
     published_at: datetime
     category: Optional[str] = None
+    feed_url: Optional[str] = None
 
 
 class BaseScraper(ABC):
+    # Feed fetching settings. max_workers=1 fetches feeds one after another.
+    max_workers: int = 8
+    max_per_host: int = 2
+    feed_timeout: float = 30.0
+    fetch_deadline: float = 120.0
+
+    def __init__(self, feed_cache: Optional[FeedCache] = None, page_cache: Optional[PageCache] = None):
+        self.feed_cache = feed_cache
+        self.page_cache = page_cache
+
     @property
     @abstractmethod
     def rss_urls(self) -> List[str]:
         """Return a list of RSS feed URLs to scrape"""
         pass
 
-    def get_articles(self, hours: int = 24) -> List[Article]:
+    @property
+    def feed_labels(self) -> Dict[str, str]:
+        """Return a mapping of feed URL to source label (e.g. the X account name)"""
+        return {}
+
+    def get_articles(self, hours: int = 24, rss_urls: Optional[List[str]] = None) -> List[Article]:
         """
-        Fetch articles from all configured RSS feeds.
+        Fetch articles from all configured RSS feeds, or only from rss_urls.
         Only returns articles from the last N hours.
-        
+
+        Feeds are fetched concurrently (bounded by max_workers and max_per_host)
+        and merged in rss_urls order, so the result is the same as fetching them
+        one by one. Feeds that have not finished within fetch_deadline seconds
+        are skipped. With a feed cache, feeds that have not changed since the
+        last committed run are not parsed and contribute no articles.
+
         Args:
             hours: Number of hours to look back for articles (default: 24)
-            
+            rss_urls: Subset of feeds to fetch (default: all of rss_urls)
+
         Returns:
             List of Article objects filtered to last N hours
         """
-        now = datetime.now(timezone.utc)
-        cutoff_time = now.timestamp() - (hours * 3600)
+        rss_urls = rss_urls or self.rss_urls
+        cutoff = datetime.fromtimestamp(datetime.now(timezone.utc).timestamp() - (hours * 3600), timezone.utc)
         articles = []
         seen_guids = set()
-        
+
+        feeds = self._fetch_feeds(rss_urls, cutoff)
+
+        for rss_url in rss_urls:
+            for article in feeds.get(rss_url, []):
+                if article.guid not in seen_guids:
+                    seen_guids.add(article.guid)
+                    articles.append(article)
+
+        return articles
+
+    def iter_articles(self, hours: int = 24) -> Iterator[Article]:
+        """
+        Lazily yield articles from the last N hours, one feed at a time.
+
+        Unlike get_articles, feeds are fetched sequentially and only when the
+        consumer asks for more, so stopping early skips the remaining feeds.
+
+        Args:
+            hours: Number of hours to look back for articles (default: 24)
+        """
+        cutoff = datetime.fromtimestamp(datetime.now(timezone.utc).timestamp() - (hours * 3600), timezone.utc)
+        seen_guids = set()
+
+        if self.feed_cache:
+            self.feed_cache.load(self.rss_urls)
+
         for rss_url in self.rss_urls:
             try:
-                feed = feedparser.parse(rss_url)
-                
-                if not feed.entries:
-                    continue
-                
-                for entry in feed.entries:
-                    published_parsed = getattr(entry, "published_parsed", None)
-                    if not published_parsed:
-                        # Try other date fields
-                        published_parsed = getattr(entry, "updated_parsed", None)
-                    
-                    if not published_parsed:
-                        continue
-                    
-                    # Parse the datetime from the parsed tuple
-                    try:
-                        published_time = datetime(*published_parsed[:6], tzinfo=timezone.utc)
-                    except (TypeError, ValueError):
-                        # Skip entries with invalid date format
-                        continue
-                    
-                    # Only include articles from the last N hours
-                    if published_time.timestamp() >= cutoff_time:
-                        guid = entry.get("id", entry.get("link", ""))
-                        if guid not in seen_guids:
-                            seen_guids.add(guid)
-                            articles.append(Article(
-                                title=entry.get("title", ""),
-                                description=entry.get("description", entry.get("summary", "")),
-                                url=entry.get("link", ""),
-                                guid=guid,
-                                published_at=published_time,
-                                category=entry.get("tags", [{}])[0].get("term") if entry.get("tags") else None
-                            ))
-            except Exception:
+                body = fetch_feed(rss_url, self.feed_cache, timeout=self.feed_timeout)
+            except Exception as e:
                 # Skip failed feeds
+                logger.warning(f"Failed to fetch feed {rss_url}: {e}")
                 continue
-        
-        return articles
+            if body is None:
+                continue
+
+            for article in self._parse_feed(body, cutoff, rss_url):
+                if article.guid not in seen_guids:
+                    seen_guids.add(article.guid)
+                    yield article
+
+    def _fetch_feeds(self, rss_urls: List[str], cutoff: datetime) -> Dict[str, List[Article]]:
+        """Fetch and parse feeds concurrently, returning articles keyed by feed URL"""
+        if not rss_urls:
+            return {}
+
+        if self.feed_cache:
+            self.feed_cache.load(rss_urls)
+
+        host_limits: Dict[str, threading.Semaphore] = {}
+        for rss_url in rss_urls:
+            host = urlparse(rss_url).netloc
+            if host not in host_limits:
+                host_limits[host] = threading.Semaphore(self.max_per_host)
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(rss_urls))))
+        futures = {
+            executor.submit(self._fetch_feed, rss_url, cutoff, host_limits[urlparse(rss_url).netloc]): rss_url
+            for rss_url in rss_urls
+        }
+        done, not_done = wait(futures, timeout=self.fetch_deadline)
+        # Don't block on stragglers; their requests are bounded by feed_timeout
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        for future in not_done:
+            logger.warning(f"Feed fetch exceeded {self.fetch_deadline}s deadline: {futures[future]}")
+
+        feeds = {}
+        for future in done:
+            try:
+                feeds[futures[future]] = future.result()
+            except Exception as e:
+                # Skip failed feeds
+                logger.warning(f"Failed to fetch feed {futures[future]}: {e}")
+        return feeds
+
+    def _fetch_feed(self, rss_url: str, cutoff: datetime, host_limit: threading.Semaphore) -> List[Article]:
+        with host_limit:
+            body = fetch_feed(rss_url, self.feed_cache, timeout=self.feed_timeout)
+        if body is None:
+            return []
+        return list(self._parse_feed(body, cutoff, rss_url))
+
+    def _parse_feed(self, body: bytes, cutoff: datetime, rss_url: str) -> Iterator[Article]:
+        try:
+            for entry in iter_feed_entries(body, cutoff=cutoff):
+                yield Article(**entry, feed_url=rss_url)
+        except etree.XMLSyntaxError:
+            # Malformed feed: fall back to feedparser's more forgiving full
+            # parse; callers skip any guids already yielded above
+            for entry in feedparser.parse(body).entries:
+                article = self._entry_to_article(entry, cutoff.timestamp(), rss_url)
+                if article:
+                    yield article
+
+    def _entry_to_article(self, entry, cutoff_time: float, rss_url: str) -> Optional[Article]:
+        published_parsed = getattr(entry, "published_parsed", None)
+        if not published_parsed:
+            # Try other date fields
+            published_parsed = getattr(entry, "updated_parsed", None)
+
+        if not published_parsed:
+            return None
+
+        # Parse the datetime from the parsed tuple
+        try:
+            published_time = datetime(*published_parsed[:6], tzinfo=timezone.utc)
+        except (TypeError, ValueError):
+            # Skip entries with invalid date format
+            return None
+
+        # Only include articles from the last N hours
+        if published_time.timestamp() < cutoff_time:
+            return None
+
+        return Article(
+            title=entry.get("title", ""),
+            description=entry.get("description", entry.get("summary", "")),
+            url=entry.get("link", ""),
+            guid=entry.get("id", entry.get("link", "")),
+            published_at=published_time,
+            category=entry.get("tags", [{}])[0].get("term") if entry.get("tags") else None,
+            feed_url=rss_url
+        )
+
+    def fetch_html(self, url: str, timeout: Optional[float] = None,
+                   deadline: Optional[float] = None) -> Optional[str]:
+        """
+        Download a page, returning its HTML or None on failure.
+
+        timeout applies to each request; deadline (a time.monotonic() value)
+        bounds the download including retries. With a page cache, fresh
+        cached HTML is returned without a request and stale HTML is
+        revalidated with a conditional GET.
+        """
+        cached = self.page_cache.get_html(url) if self.page_cache else None
+        if cached and cached.fresh:
+            return cached.html
+
+        headers = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        try:
+            response = get_fetcher().get(url, headers=headers, timeout=timeout, deadline=deadline)
+            if cached and response.status_code == 304:
+                self._update_page_cache(self.page_cache.touch_html, url)
+                return cached.html
+            response.raise_for_status()
+        except Exception:
+            return None
+
+        html = response.text
+        if self.page_cache:
+            self._update_page_cache(
+                self.page_cache.put_html, url, html,
+                etag=response.header("ETag"), last_modified=response.header("Last-Modified")
+            )
+        return html
+
+    def url_to_markdown(self, url: str) -> Optional[str]:
+        """
+        Download a page and convert it to markdown using html_to_markdown,
+        reusing earlier results from the page cache when possible.
+
+        Args:
+            url: URL of the page
+
+        Returns:
+            Markdown content as string, or None if download or conversion fails
+        """
+        markdown = self.cached_markdown(url)
+        if markdown:
+            return markdown
+
+        html = self.fetch_html(url)
+        if html is None:
+            return None
+        markdown = convert_html(html)
+        if markdown:
+            self.cache_markdown(url, markdown)
+        return markdown
+
+    def cached_markdown(self, url: str) -> Optional[str]:
+        return self.page_cache.get_markdown(url) if self.page_cache else None
+
+    def cache_markdown(self, url: str, markdown: str) -> None:
+        if self.page_cache:
+            self._update_page_cache(self.page_cache.put_markdown, url, markdown)
+
+    def _update_page_cache(self, method, *args, **kwargs) -> None:
+        # The cache is an optimisation; never fail a download because of it
+        try:
+            method(*args, **kwargs)
+        except OSError as e:
+            logger.warning(f"Failed to update page cache: {e}")
+
+
+def convert_html(html: str) -> Optional[str]:
+    """Convert HTML to markdown; module-level so it can run in a process pool"""
+    try:
+        return convert(html)
+    except Exception:
+        return None
@@ -0,0 +1,103 @@
+from typing import Dict, List, Optional
+import hashlib
+import logging
+import threading
+from .fetcher import get_fetcher
+
+logger = logging.getLogger(__name__)
+
+
+class FeedCache:
+    """
+    Remembers ETag, Last-Modified and a content hash for each feed URL so
+    unchanged feeds can be skipped without parsing.
+
+    New validators are held back until commit() is called, which callers
+    should do only after the scraped items have been stored. That way a run
+    that fails before saving will fetch the same feeds again next time.
+    """
+
+    def __init__(self, repo=None):
+        self.repo = repo
+        self._states: Dict[str, dict] = {}
+        self._loaded: set = set()
+        self._pending: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def load(self, urls: List[str]) -> None:
+        missing = [url for url in urls if url not in self._loaded]
+        if not missing or self.repo is None:
+            return
+        self._loaded.update(missing)
+        for url, state in self.repo.get_feed_states(missing).items():
+            self._states[url] = {
+                "url": url,
+                "etag": state.etag,
+                "last_modified": state.last_modified,
+                "content_hash": state.content_hash,
+            }
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        state = self._states.get(url)
+        headers = {}
+        if state and state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state and state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        return headers
+
+    def is_unchanged(self, url: str, content_hash: str) -> bool:
+        state = self._states.get(url)
+        return bool(state) and state.get("content_hash") == content_hash
+
+    def record(self, url: str, etag: Optional[str], last_modified: Optional[str], content_hash: str) -> None:
+        with self._lock:
+            self._pending[url] = {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": content_hash,
+            }
+
+    def commit(self) -> int:
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        if not pending:
+            return 0
+        for state in pending:
+            self._states[state["url"]] = state
+        if self.repo is None:
+            return len(pending)
+        return self.repo.save_feed_states(pending)
+
+
+def fetch_feed(url: str, feed_cache: Optional[FeedCache] = None, timeout: float = 30.0) -> Optional[bytes]:
+    """
+    Download a feed document, sending conditional request headers when a
+    feed cache is given.
+
+    Returns:
+        The feed body, or None if the feed has not changed since the last commit
+    """
+    headers = feed_cache.request_headers(url) if feed_cache else {}
+
+    response = get_fetcher().get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        logger.debug(f"Feed not modified: {url}")
+        return None
+    response.raise_for_status()
+
+    body = response.content
+    if feed_cache:
+        content_hash = hashlib.sha256(body).hexdigest()
+        if feed_cache.is_unchanged(url, content_hash):
+            logger.debug(f"Feed content unchanged: {url}")
+            return None
+        feed_cache.record(
+            url,
+            etag=response.header("ETag"),
+            last_modified=response.header("Last-Modified"),
+            content_hash=content_hash,
+        )
+    return body
@@ -0,0 +1,253 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import logging
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class FetchResponse:
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    encoding: Optional[str] = None
+    # Body size as transferred, before gzip/brotli decoding
+    wire_bytes: int = 0
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def header(self, name: str) -> Optional[str]:
+        return self.headers.get(name.lower())
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise FetchError(f"HTTP {self.status_code} for {self.url}")
+
+
+class HostStats(BaseModel):
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    wire_bytes: int = 0
+    decoded_bytes: int = 0
+    latency_seconds: float = 0.0
+    connections: int = 0
+    pool_requests: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Share of requests served over an already open connection"""
+        if not self.pool_requests:
+            return 0.0
+        return max(0.0, 1 - self.connections / self.pool_requests)
+
+
+class HttpFetcher:
+    """
+    Thread-safe HTTP client shared by the scrapers.
+
+    Keeps a keep-alive connection pool per host, negotiates gzip (and brotli
+    when the brotli package is installed), streams bodies with a size cap and
+    retries transient failures with jittered exponential backoff.
+    """
+
+    def __init__(self, timeout: float = 30.0, max_bytes: int = 10 * 1024 * 1024,
+                 max_retries: int = 3, backoff: float = 0.5, max_backoff: float = 30.0,
+                 pool_hosts: int = 32, pool_size: int = 10):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self.session.headers.update({
+            "User-Agent": "Mozilla/5.0",
+            "Accept-Encoding": ACCEPT_ENCODING,
+        })
+
+        self._stats: Dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[float] = None, max_bytes: Optional[int] = None,
+            deadline: Optional[float] = None) -> FetchResponse:
+        """
+        GET a URL, retrying connection errors, timeouts and 429/5xx responses.
+
+        timeout applies to each connect and read. deadline, a time.monotonic()
+        value, bounds the whole call: attempts, retry delays and the download.
+        Other HTTP errors are returned as-is; call raise_for_status() to turn
+        them into a FetchError.
+
+        Raises:
+            FetchError: If all attempts fail, the deadline passes or the body exceeds max_bytes
+        """
+        host = urlparse(url).netloc
+        last_error: Optional[Exception] = None
+        attempts = 0
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = self._retry_delay(attempt, last_error)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    break
+                self._record(host, retries=1)
+                time.sleep(delay)
+
+            attempt_timeout = timeout or self.timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                attempt_timeout = min(attempt_timeout, remaining)
+
+            attempts += 1
+            started = time.perf_counter()
+            try:
+                response = self._get_once(url, headers, attempt_timeout, max_bytes, deadline)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(host, request_count=1, errors=1, latency=time.perf_counter() - started)
+                last_error = e
+                continue
+            except FetchError:
+                # Over the size cap or past the deadline; not worth retrying
+                self._record(host, request_count=1, errors=1, latency=time.perf_counter() - started)
+                raise
+
+            self._record(host, request_count=1, wire_bytes=response.wire_bytes,
+                         decoded_bytes=len(response.content), latency=time.perf_counter() - started)
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                self._record(host, errors=1)
+                last_error = _RetryableStatus(response)
+                continue
+            return response
+
+        if attempts <= self.max_retries:
+            raise FetchError(f"Deadline passed fetching {url} after {attempts} attempts: {last_error}")
+        raise FetchError(f"Failed to fetch {url} after {attempts} attempts: {last_error}")
+
+    def _get_once(self, url: str, headers: Optional[Dict[str, str]], timeout: Optional[float],
+                  max_bytes: Optional[int], deadline: Optional[float] = None) -> FetchResponse:
+        limit = max_bytes or self.max_bytes
+        with self.session.get(url, headers=headers, timeout=timeout or self.timeout, stream=True) as response:
+            self._record_pool(urlparse(url).netloc, response.raw)
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > limit:
+                raise FetchError(f"Response from {url} is {declared} bytes, over the {limit} byte limit")
+
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                size += len(chunk)
+                if size > limit:
+                    raise FetchError(f"Response from {url} exceeded the {limit} byte limit")
+                if deadline is not None and time.monotonic() > deadline:
+                    raise FetchError(f"Deadline passed while downloading {url}")
+                chunks.append(chunk)
+
+            return FetchResponse(
+                url=response.url,
+                status_code=response.status_code,
+                headers={k.lower(): v for k, v in response.headers.items()},
+                content=b"".join(chunks),
+                encoding=requests.utils.get_encoding_from_headers(response.headers)
+                if "charset" in response.headers.get("Content-Type", "").lower() else None,
+                # urllib3 counts the bytes read off the connection
+                wire_bytes=response.raw.tell(),
+            )
+
+    def _retry_delay(self, attempt: int, error: Optional[Exception]) -> float:
+        if isinstance(error, _RetryableStatus):
+            retry_after = error.response.header("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _record(self, host: str, request_count: int = 0, errors: int = 0, retries: int = 0,
+                wire_bytes: int = 0, decoded_bytes: int = 0, latency: float = 0.0) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(host, HostStats())
+            stats.requests += request_count
+            stats.errors += errors
+            stats.retries += retries
+            stats.wire_bytes += wire_bytes
+            stats.decoded_bytes += decoded_bytes
+            stats.latency_seconds += latency
+
+    def _record_pool(self, host: str, raw) -> None:
+        """
+        Copy the connection counts of the urllib3 pool that served a response.
+        Looking the pool up by URL would not find it: requests keys its pools
+        with extra pool arguments, so that lookup returns a new, empty pool.
+        """
+        pool = getattr(raw, "_pool", None)
+        if pool is None:
+            return
+        with self._lock:
+            stats = self._stats.setdefault(host, HostStats())
+            # urllib3 counts new connections and requests per host pool
+            stats.connections = pool.num_connections
+            stats.pool_requests = pool.num_requests
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                host: {
+                    "requests": s.requests,
+                    "errors": s.errors,
+                    "retries": s.retries,
+                    "wire_bytes": s.wire_bytes,
+                    "decoded_bytes": s.decoded_bytes,
+                    "avg_latency_seconds": round(s.latency_seconds / s.requests, 3) if s.requests else 0.0,
+                    "reuse_ratio": round(s.reuse_ratio, 3),
+                }
+                for host, s in self._stats.items()
+            }
+
+    def log_stats(self) -> None:
+        for host, s in self.stats().items():
+            logger.info(f"HTTP {host}: {s['requests']} requests, {s['wire_bytes']} bytes transferred "
+                        f"({s['decoded_bytes']} decoded), "
+                        f"{s['avg_latency_seconds']}s avg, {s['reuse_ratio']:.0%} connection reuse, "
+                        f"{s['retries']} retries, {s['errors']} errors")
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, response: FetchResponse):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+_fetcher: Optional[HttpFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher() -> HttpFetcher:
+    """Return the process-wide fetcher so all callers share one connection pool"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = HttpFetcher()
+        return _fetcher
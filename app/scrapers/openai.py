@@ -1,4 +1,5 @@
-from typing import List
+from typing import Dict, List, Optional
+from app.config import OPENAI_FEEDS
 from .base import BaseScraper, Article
 
 
@@ -9,10 +10,14 @@ class OpenAIArticle(Article):
 class OpenAIScraper(BaseScraper):
     @property
     def rss_urls(self) -> List[str]:
-        return ["https://openai.com/news/rss.xml"]
+        return list(OPENAI_FEEDS)
 
-    def get_articles(self, hours: int = 24) -> List[OpenAIArticle]:
-        return [OpenAIArticle(**article.model_dump()) for article in super().get_articles(hours)]
+    @property
+    def feed_labels(self) -> Dict[str, str]:
+        return OPENAI_FEEDS
+
+    def get_articles(self, hours: int = 24, rss_urls: Optional[List[str]] = None) -> List[OpenAIArticle]:
+        return [OpenAIArticle(**article.model_dump()) for article in super().get_articles(hours, rss_urls)]
 
   
 if __name__ == "__main__":
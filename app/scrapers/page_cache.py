@@ -0,0 +1,251 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class CachedHtml(BaseModel):
+    html: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fresh: bool
+
+
+class PageCache:
+    """
+    On-disk cache of downloaded HTML and converted markdown, keyed by URL.
+
+    Bodies are stored gzip-compressed under the SHA-256 of their content, so
+    identical pages share one blob. A small JSON entry per URL records the
+    blob hashes, the HTTP validators and when each body was produced. Reads
+    touch the blob, and once the cache (blobs and entries) grows past
+    max_bytes, expired entries and the least recently used blobs are deleted.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None,
+                 html_ttl: float = 7 * 86400, markdown_ttl: float = 30 * 86400):
+        self.directory = Path(directory or os.getenv("PAGE_CACHE_DIR", ".cache/pages"))
+        self.max_bytes = max_bytes or int(os.getenv("PAGE_CACHE_MAX_MB", "500")) * 1024 * 1024
+        self.html_ttl = html_ttl
+        self.markdown_ttl = markdown_ttl
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get_markdown(self, url: str) -> Optional[str]:
+        """Return cached markdown if it is within its TTL and its HTML has not changed since"""
+        entry = self._read_entry(url)
+        markdown = entry.get("markdown")
+        if not markdown or self._age(markdown["converted_at"]) > self.markdown_ttl:
+            return None
+        html = entry.get("html")
+        if html and html["sha"] != markdown["source_sha"]:
+            return None
+        return self._read_blob(markdown["sha"])
+
+    def get_html(self, url: str) -> Optional[CachedHtml]:
+        """Return cached HTML, flagged stale once past its TTL so it can be revalidated"""
+        html = self._read_entry(url).get("html")
+        if not html:
+            return None
+        content = self._read_blob(html["sha"])
+        if content is None:
+            return None
+        return CachedHtml(
+            html=content,
+            etag=html.get("etag"),
+            last_modified=html.get("last_modified"),
+            fresh=self._age(html["fetched_at"]) <= self.html_ttl,
+        )
+
+    def put_html(self, url: str, html: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        sha = self._write_blob(html)
+        with self._lock:
+            entry = self._read_entry(url)
+            entry["html"] = {
+                "sha": sha,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": self._now(),
+            }
+            self._write_entry(url, entry)
+
+    def touch_html(self, url: str) -> None:
+        """Mark cached HTML as fresh again, e.g. after a 304 Not Modified"""
+        with self._lock:
+            entry = self._read_entry(url)
+            if entry.get("html"):
+                entry["html"]["fetched_at"] = self._now()
+                self._write_entry(url, entry)
+
+    def put_markdown(self, url: str, markdown: str) -> None:
+        sha = self._write_blob(markdown)
+        with self._lock:
+            entry = self._read_entry(url)
+            html = entry.get("html")
+            entry["markdown"] = {
+                "sha": sha,
+                "source_sha": html["sha"] if html else None,
+                "converted_at": self._now(),
+            }
+            self._write_entry(url, entry)
+
+    def evict(self) -> int:
+        """
+        Shrink the cache to under 90% of max_bytes, returning how many files
+        were deleted. Entries and blobs both count toward the size. Entries
+        whose every body is past its TTL go first, then the least recently
+        used blobs along with the entry parts that point to them.
+        """
+        with self._lock:
+            entries = {}
+            size = 0
+            removed_entries = 0
+            for path in (self.directory / "entries").glob("*.json"):
+                try:
+                    entry_size = path.stat().st_size
+                    entry = json.loads(path.read_text())
+                except FileNotFoundError:
+                    continue
+                except ValueError:
+                    entry = {}
+                if self._expired(entry):
+                    path.unlink(missing_ok=True)
+                    removed_entries += 1
+                    continue
+                entries[path] = entry
+                size += entry_size
+
+            blobs = []
+            for path in (self.directory / "blobs").glob("*/*.gz"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+            size += sum(b[1] for b in blobs)
+
+            target = int(self.max_bytes * 0.9)
+            evicted = set()
+            for _, blob_size, path in sorted(blobs, key=lambda b: b[0]):
+                if size <= target:
+                    break
+                path.unlink(missing_ok=True)
+                size -= blob_size
+                evicted.add(path.name[:-len(".gz")])
+
+            if evicted:
+                for path, entry in entries.items():
+                    kept = {part: value for part, value in entry.items()
+                            if not (isinstance(value, dict) and value.get("sha") in evicted)}
+                    if kept == entry:
+                        continue
+                    old_size = path.stat().st_size
+                    if any(part in kept for part in ("html", "markdown")):
+                        self._atomic_write(path, json.dumps(kept).encode())
+                        size += path.stat().st_size - old_size
+                    else:
+                        path.unlink(missing_ok=True)
+                        size -= old_size
+                        removed_entries += 1
+            self._size = size
+        if evicted or removed_entries:
+            logger.info(f"Evicted {len(evicted)} blobs and {removed_entries} entries from page cache")
+        return len(evicted) + removed_entries
+
+    def _expired(self, entry: dict) -> bool:
+        """True if the entry has no body still within its TTL"""
+        html = entry.get("html")
+        markdown = entry.get("markdown")
+        html_fresh = html and self._age(html["fetched_at"]) <= self.html_ttl
+        markdown_fresh = markdown and self._age(markdown["converted_at"]) <= self.markdown_ttl
+        return not (html_fresh or markdown_fresh)
+
+    def _entry_path(self, url: str) -> Path:
+        return self.directory / "entries" / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def _blob_path(self, sha: str) -> Path:
+        return self.directory / "blobs" / sha[:2] / f"{sha}.gz"
+
+    def _read_entry(self, url: str) -> dict:
+        try:
+            return json.loads(self._entry_path(url).read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_entry(self, url: str, entry: dict) -> None:
+        entry["url"] = url
+        path = self._entry_path(url)
+        data = json.dumps(entry).encode()
+        if self._size is not None:
+            try:
+                self._size -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+            self._size += len(data)
+        self._atomic_write(path, data)
+
+    def _disk_size(self) -> int:
+        files = list((self.directory / "blobs").glob("*/*.gz")) + list((self.directory / "entries").glob("*.json"))
+        size = 0
+        for path in files:
+            try:
+                size += path.stat().st_size
+            except FileNotFoundError:
+                pass
+        return size
+
+    def _read_blob(self, sha: str) -> Optional[str]:
+        path = self._blob_path(sha)
+        try:
+            data = gzip.decompress(path.read_bytes()).decode("utf-8")
+        except (FileNotFoundError, OSError, EOFError):
+            return None
+        # Record the access for LRU eviction
+        path.touch(exist_ok=True)
+        return data
+
+    def _write_blob(self, content: str) -> str:
+        data = content.encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha)
+        if path.exists():
+            path.touch()
+            return sha
+        compressed = gzip.compress(data, compresslevel=6)
+        self._atomic_write(path, compressed)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_size()
+            else:
+                self._size += len(compressed)
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self.evict()
+        return sha
+
+    def _atomic_write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _now(self) -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    def _age(self, timestamp: str) -> float:
+        return (datetime.now(timezone.utc) - datetime.fromisoformat(timestamp)).total_seconds()
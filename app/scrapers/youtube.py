@@ -1,11 +1,21 @@
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import itertools
 import os
+import logging
+import threading
 import feedparser
 from pydantic import BaseModel
 from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
-from youtube_transcript_api.proxies import WebshareProxyConfig
+from youtube_transcript_api._errors import (
+    AgeRestricted, InvalidVideoId, NoTranscriptFound, TranscriptsDisabled, VideoUnavailable, VideoUnplayable
+)
+from youtube_transcript_api.proxies import GenericProxyConfig, ProxyConfig, WebshareProxyConfig
+from .feed_cache import FeedCache, fetch_feed
+from .rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
 
 
 class Transcript(BaseModel):
@@ -22,17 +32,47 @@ class ChannelVideo(BaseModel):
 
 
 class YouTubeScraper:
-    def __init__(self):
-        proxy_config = None
+    """
+    Scrapes channel feeds and transcripts.
+
+    Transcript requests are spread round-robin over every configured proxy
+    (Webshare credentials and/or YOUTUBE_PROXY_URLS), each with its own token
+    bucket of YOUTUBE_REQUESTS_PER_SECOND, so adding proxies raises the
+    overall rate without raising the rate any single IP sees.
+    """
+
+    def __init__(self, feed_cache: Optional[FeedCache] = None, max_workers: int = 8,
+                 requests_per_second: Optional[float] = None):
+        self.feed_cache = feed_cache
+        self.max_workers = max_workers
+        rate = requests_per_second or float(os.getenv("YOUTUBE_REQUESTS_PER_SECOND", "1.0"))
+
+        self._transcript_clients: List[Tuple[YouTubeTranscriptApi, TokenBucket]] = [
+            (YouTubeTranscriptApi(proxy_config=proxy_config), TokenBucket(rate))
+            for proxy_config in self._get_proxy_configs()
+        ]
+        self._client_cycle = itertools.cycle(self._transcript_clients)
+        self._client_lock = threading.Lock()
+        self.transcript_api = self._transcript_clients[0][0]
+        self.feed_limiter = TokenBucket(rate * 5)
+
+    def _get_proxy_configs(self) -> List[Optional[ProxyConfig]]:
+        proxy_configs: List[Optional[ProxyConfig]] = []
         proxy_username = os.getenv("WEBSHARE_USERNAME")
         proxy_password = os.getenv("WEBSHARE_PASSWORD")
 
         if proxy_username and proxy_password:
-            proxy_config = WebshareProxyConfig(
+            proxy_configs.append(WebshareProxyConfig(
                 proxy_username=proxy_username, proxy_password=proxy_password
-            )
+            ))
 
-        self.transcript_api = YouTubeTranscriptApi(proxy_config=proxy_config)
+        for proxy_url in os.getenv("YOUTUBE_PROXY_URLS", "").split(","):
+            if proxy_url.strip():
+                proxy_configs.append(GenericProxyConfig(
+                    http_url=proxy_url.strip(), https_url=proxy_url.strip()
+                ))
+
+        return proxy_configs or [None]
 
     def _get_rss_url(self, channel_id: str) -> str:
         return f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
@@ -47,17 +87,37 @@ class YouTubeScraper:
         return video_url
 
     def get_transcript(self, video_id: str) -> Optional[Transcript]:
+        """
+        None if the video has no captions or cannot be watched (removed,
+        private, unplayable, age restricted). Other failures (blocked IPs,
+        rate limits, network errors) are raised, since a later attempt may
+        succeed.
+        """
+        with self._client_lock:
+            transcript_api, limiter = next(self._client_cycle)
+        limiter.acquire()
         try:
-            transcript = self.transcript_api.fetch(video_id)
+            transcript = transcript_api.fetch(video_id)
             text = " ".join([snippet.text for snippet in transcript.snippets])
             return Transcript(text=text)
-        except (TranscriptsDisabled, NoTranscriptFound):
-            return None
-        except Exception:
+        except (TranscriptsDisabled, NoTranscriptFound, VideoUnavailable, VideoUnplayable,
+                AgeRestricted, InvalidVideoId):
             return None
 
     def get_latest_videos(self, channel_id: str, hours: int = 24) -> list[ChannelVideo]:
-        feed = feedparser.parse(self._get_rss_url(channel_id))
+        rss_url = self._get_rss_url(channel_id)
+        if self.feed_cache:
+            self.feed_cache.load([rss_url])
+        self.feed_limiter.acquire()
+        try:
+            body = fetch_feed(rss_url, self.feed_cache)
+        except Exception as e:
+            logger.warning(f"Failed to fetch feed for channel {channel_id}: {e}")
+            return []
+        if body is None:
+            return []
+
+        feed = feedparser.parse(body)
         if not feed.entries:
             return []
 
@@ -82,18 +142,40 @@ class YouTubeScraper:
 
         return videos
 
+    def get_latest_videos_for_channels(self, channel_ids: List[str], hours: int = 24) -> Dict[str, List[ChannelVideo]]:
+        """Fetch the latest videos of many channels concurrently, keyed by channel ID in input order"""
+        if self.feed_cache:
+            # Load feed state up front; the cache's repository session must stay on this thread
+            self.feed_cache.load([self._get_rss_url(channel_id) for channel_id in channel_ids])
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(lambda channel_id: self.get_latest_videos(channel_id, hours), channel_ids)
+            return dict(zip(channel_ids, results))
+
+    def _get_transcript_or_none(self, video_id: str) -> Optional[Transcript]:
+        try:
+            return self.get_transcript(video_id)
+        except Exception as e:
+            logger.warning(f"Failed to fetch transcript for {video_id}: {e}")
+            return None
+
+    def get_transcripts(self, video_ids: List[str]) -> Dict[str, Optional[Transcript]]:
+        """
+        Fetch transcripts for many videos concurrently, within the per-proxy
+        rate limits. A video whose fetch failed maps to None.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(zip(video_ids, executor.map(self._get_transcript_or_none, video_ids)))
+
     def scrape_channel(self, channel_id: str, hours: int = 150) -> list[ChannelVideo]:
         videos = self.get_latest_videos(channel_id, hours)
-        result = []
-        for video in videos:
-            transcript = self.get_transcript(video.video_id)
-            result.append(
-                video.model_copy(
-                    update={"transcript": transcript.text if transcript else None}
-                )
+        transcripts = self.get_transcripts([video.video_id for video in videos])
+        return [
+            video.model_copy(
+                update={"transcript": transcripts[video.video_id].text if transcripts[video.video_id] else None}
             )
-        return result
-
+            for video in videos
+        ]
 
 if __name__ == "__main__":
     scraper = YouTubeScraper()
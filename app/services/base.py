@@ -1,56 +1,149 @@
-from typing import Optional, Dict, Any
+from typing import Iterable, List, Optional, Dict, Any
+from collections.abc import Sized
 from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import asyncio
 import logging
+import threading
+import time
+from app.database.repository import Repository
+from .job_queue import JobQueue
 
 logger = logging.getLogger(__name__)
 
 
+class _ItemRun:
+    """
+    Hand-off between a worker thread and the coordinator for one item.
+
+    The coordinator can give up on an item that overran its timeout, unless
+    its worker already started saving the result; once given up, the worker
+    drops the result instead of saving it. Either way it is counted once.
+    """
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._abandoned = False
+        self._saving = False
+
+    def begin_save(self) -> bool:
+        with self._lock:
+            self._saving = not self._abandoned
+            return self._saving
+
+    def abandon(self) -> bool:
+        with self._lock:
+            self._abandoned = not self._saving
+            return self._abandoned
+
+
 class BaseProcessService(ABC):
+    # Name of this processor's jobs in the jobs table; needed for run_worker
+    job_stage: Optional[str] = None
+    _repo: Optional[Repository] = None
+
     def __init__(self):
         self.logger = logger
+        self._local = threading.local()
+        self._item_pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def repo(self) -> Optional[Repository]:
+        """The processor's repository; each worker thread of process() gets its own session"""
+        return getattr(self._local, "repo", None) or self._repo
+
+    @repo.setter
+    def repo(self, repo: Repository) -> None:
+        self._repo = repo
 
     @abstractmethod
     def process_item(self, item: Any) -> Optional[Any]:
         pass
 
     @abstractmethod
-    def get_items_to_process(self, limit: Optional[int] = None) -> list:
+    def get_items_to_process(self, limit: Optional[int] = None) -> Iterable:
         pass
 
     @abstractmethod
     def save_result(self, item: Any, result: Any) -> bool:
         pass
 
-    def process(self, limit: Optional[int] = None) -> Dict[str, Any]:
-        items = self.get_items_to_process(limit=limit)
-        total = len(items)
-        processed = 0
-        failed = 0
+    def count_items_to_process(self, items: Iterable, limit: Optional[int] = None) -> Optional[int]:
+        """Number of items for progress logging, or None if it is not known up front"""
+        return len(items) if isinstance(items, Sized) else None
 
-        self.logger.info(f"Starting processing for {total} items")
+    def flush_results(self, force: bool = False) -> int:
+        """
+        Write results that save_result buffered instead of saving straight away.
 
-        for idx, item in enumerate(items, 1):
-            item_id = self._get_item_id(item)
-            item_title = self._get_item_title(item)
-            display_title = item_title[:60] + "..." if len(item_title) > 60 else item_title
+        Called after every item and, with force, once at the end. Returns how
+        many buffered results failed to save; they were already counted as
+        processed and are moved to failed.
+        """
+        return 0
 
-            self.logger.info(f"[{idx}/{total}] Processing {display_title} (ID: {item_id})")
+    def get_items_for_keys(self, keys: List[str]) -> Iterable:
+        """Items for the given job keys that still need processing"""
+        raise NotImplementedError(f"{type(self).__name__} cannot run as a worker")
 
-            try:
-                result = self.process_item(item)
-                if result:
-                    if self.save_result(item, result):
-                        processed += 1
-                        self.logger.info(f"✓ Successfully processed {item_id}")
-                    else:
-                        failed += 1
-                        self.logger.warning(f"✗ Failed to save result for {item_id}")
-                else:
-                    failed += 1
-                    self.logger.warning(f"✗ Failed to process {item_id}")
-            except Exception as e:
-                failed += 1
-                self.logger.error(f"✗ Error processing {item_id}: {e}")
+    def job_key(self, item: Any) -> str:
+        return self._get_item_id(item)
+
+    def pending_job_keys(self) -> List[str]:
+        """Job keys for every item that needs processing, for run_worker to enqueue"""
+        return [self.job_key(item) for item in self.get_items_to_process()]
+
+    async def process_item_async(self, item: Any) -> Optional[Any]:
+        """
+        process_item for the asyncio mode of process(). Runs process_item on
+        a thread by default; override it with native async code so a timeout
+        or shutdown cancels the work itself rather than abandoning a thread.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._item_pool, self.process_item, item)
+
+    def process(self, limit: Optional[int] = None, max_workers: int = 1, mode: str = "thread",
+                item_timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Process and save every pending item, returning total/processed/failed counts.
+
+        With max_workers above 1, up to that many items are in flight at once,
+        either on a thread pool (mode "thread") or as asyncio tasks (mode
+        "asyncio"). In thread mode each worker thread also runs save_result,
+        with its own session behind self.repo. In asyncio mode results are
+        saved on the event loop's thread, one at a time. An item that runs past
+        item_timeout seconds counts as failed and its result is dropped. On
+        shutdown, items not started yet are cancelled and results still in
+        flight are dropped; finished ones are flushed as usual.
+        """
+        if mode not in ("thread", "asyncio"):
+            raise ValueError(f"Unknown mode {mode!r}, expected 'thread' or 'asyncio'")
+        items = self.get_items_to_process(limit=limit)
+        total = self.count_items_to_process(items, limit=limit)
+        stats = {"processed": 0, "failed": 0, "seen": 0}
+
+        concurrency = f" with {max_workers} {mode} workers" if max_workers > 1 else ""
+        self.logger.info(f"Starting processing for {total if total is not None else 'streamed'} items{concurrency}")
+
+        try:
+            if max_workers <= 1:
+                for idx, item in enumerate(items, 1):
+                    stats["seen"] = idx
+                    self._record(stats, self._process_one(item, f"{idx}/{total or '?'}"))
+            elif mode == "thread":
+                self._process_threaded(items, total, stats, max_workers, item_timeout)
+            else:
+                asyncio.run(self._process_async(items, total, stats, max_workers, item_timeout))
+        finally:
+            # Also runs on KeyboardInterrupt, so finished work is not thrown away
+            lost = self.flush_results(force=True)
+            stats["processed"] -= lost
+            stats["failed"] += lost
+
+        if not isinstance(items, Sized):
+            # A count taken before streaming is only an estimate
+            total = stats["seen"]
+        processed, failed = stats["processed"], stats["failed"]
 
         self.logger.info(f"Processing complete: {processed} processed, {failed} failed out of {total} total")
 
@@ -60,6 +153,206 @@ class BaseProcessService(ABC):
             "failed": failed
         }
 
+    def _record(self, stats: Dict[str, int], succeeded: bool) -> None:
+        stats["processed" if succeeded else "failed"] += 1
+        lost = self.flush_results()
+        stats["processed"] -= lost
+        stats["failed"] += lost
+
+    def _process_threaded(self, items: Iterable, total: Optional[int], stats: Dict[str, int],
+                          max_workers: int, item_timeout: Optional[float]) -> None:
+        repos: List[Repository] = []
+
+        def start_worker() -> None:
+            # Sessions must not be shared between threads
+            self._local.repo = Repository()
+            repos.append(self._local.repo)
+
+        pool = ThreadPoolExecutor(max_workers=max_workers, initializer=start_worker,
+                                  thread_name_prefix=type(self).__name__)
+        running: Dict[Any, tuple] = {}
+        pending = enumerate(items, 1)
+        exhausted = False
+        try:
+            while True:
+                # Only submit what can start now, so streamed items are read as needed
+                while not exhausted and len(running) < max_workers:
+                    next_item = next(pending, None)
+                    if next_item is None:
+                        exhausted = True
+                        break
+                    idx, item = next_item
+                    stats["seen"] = idx
+                    run = _ItemRun()
+                    future = pool.submit(self._process_one, item, f"{idx}/{total or '?'}", run)
+                    running[future] = (run, self._get_item_id(item))
+                if not running:
+                    break
+
+                started = [run.started_at for run, _ in running.values() if run.started_at is not None]
+                timeout = None
+                if item_timeout and started:
+                    timeout = max(0.0, min(started) + item_timeout - time.monotonic())
+                elif item_timeout:
+                    # Workers have not picked their items up yet; look again shortly
+                    timeout = 0.1
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    self._record(stats, future.result())
+
+                if item_timeout:
+                    now = time.monotonic()
+                    for future, (run, item_id) in list(running.items()):
+                        if run.started_at is not None and now - run.started_at >= item_timeout and run.abandon():
+                            # The thread cannot be stopped; whatever it returns is dropped
+                            running.pop(future)
+                            self.logger.warning(f"✗ Timed out processing {item_id} after {item_timeout}s")
+                            self._record(stats, False)
+        finally:
+            for run, _ in running.values():
+                run.abandon()
+            pool.shutdown(wait=True, cancel_futures=True)
+            for repo in repos:
+                repo.session.close()
+
+    async def _process_async(self, items: Iterable, total: Optional[int], stats: Dict[str, int],
+                             max_workers: int, item_timeout: Optional[float]) -> None:
+        self._item_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=type(self).__name__)
+        slots = asyncio.Semaphore(max_workers)
+        tasks = set()
+
+        async def run(item: Any, position: str) -> None:
+            try:
+                self._record(stats, await self._process_one_async(item, position, item_timeout))
+            finally:
+                slots.release()
+
+        try:
+            for idx, item in enumerate(items, 1):
+                await slots.acquire()
+                stats["seen"] = idx
+                task = asyncio.create_task(run(item, f"{idx}/{total or '?'}"))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._item_pool.shutdown(wait=False, cancel_futures=True)
+            self._item_pool = None
+
+    async def _process_one_async(self, item: Any, position: str, item_timeout: Optional[float]) -> bool:
+        item_id = self._log_start(item, position)
+        try:
+            result = await asyncio.wait_for(self.process_item_async(item), timeout=item_timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"✗ Timed out processing {item_id} after {item_timeout}s")
+            return False
+        except Exception as e:
+            self.logger.error(f"✗ Error processing {item_id}: {e}")
+            return False
+        return self._save_one(item, item_id, result)
+
+    def run_worker(self, batch_size: int = 20, lease_seconds: float = 300.0, max_attempts: int = 3,
+                   worker_id: Optional[str] = None, enqueue: bool = True, retry_seconds: float = 60.0,
+                   retry_failed: bool = False) -> Dict[str, Any]:
+        """
+        Process items as one of any number of workers sharing the jobs table.
+
+        Enqueues a job for every pending item (unless enqueue is False), then
+        claims batches of jobs until none are claimable. Items are reloaded
+        from their keys and skipped if another worker already saved a result,
+        and a job is only completed once its result is saved, so a worker that
+        crashes mid-batch has its jobs picked up by others when the lease
+        runs out. A failed job waits retry_seconds (doubling per attempt)
+        before it can be claimed again, and is marked failed after
+        max_attempts. Failed jobs are only retried with retry_failed.
+        """
+        if not self.job_stage:
+            raise NotImplementedError(f"{type(self).__name__} has no job_stage")
+        queue = JobQueue(self.job_stage, worker_id=worker_id, lease_seconds=lease_seconds,
+                         max_attempts=max_attempts, retry_seconds=retry_seconds)
+        if retry_failed:
+            reset = queue.reset_failed()
+            self.logger.info(f"Reset {reset} failed {self.job_stage} jobs")
+        if enqueue:
+            added = queue.enqueue(self.pending_job_keys())
+            self.logger.info(f"Enqueued {added} {self.job_stage} jobs")
+
+        processed = 0
+        failed = 0
+        self.logger.info(f"Worker {queue.worker_id} starting on {self.job_stage} jobs")
+        while True:
+            keys = queue.claim(batch_size)
+            if not keys:
+                break
+            saved: List[str] = []
+            retry: List[str] = []
+            items = list(self.get_items_for_keys(keys))
+            found = {self.job_key(item) for item in items}
+            # Nothing left to do for these; another worker saved their results
+            done = [key for key in keys if key not in found]
+            try:
+                for idx, item in enumerate(items, 1):
+                    key = self.job_key(item)
+                    (saved if self._process_one(item, f"{idx}/{len(items)}") else retry).append(key)
+                    queue.renew_if_due()
+            finally:
+                # Buffered results are written before their jobs are completed
+                lost = self.flush_results(force=True)
+            if lost:
+                # The writer does not say which results failed, so retry the whole batch
+                retry, saved = retry + saved, []
+            queue.complete(done + saved)
+            queue.fail(retry, error="Processing or saving the result failed")
+            processed += len(saved)
+            failed += len(retry)
+
+        self.logger.info(f"Worker {queue.worker_id} finished: {processed} processed, {failed} failed")
+        return {
+            "total": processed + failed,
+            "processed": processed,
+            "failed": failed
+        }
+
+    def _process_one(self, item: Any, position: str, run: Optional[_ItemRun] = None) -> bool:
+        """Process and save one item, logging the outcome; True if it succeeded"""
+        if run:
+            run.started_at = time.monotonic()
+        item_id = self._log_start(item, position)
+
+        try:
+            result = self.process_item(item)
+        except Exception as e:
+            self.logger.error(f"✗ Error processing {item_id}: {e}")
+            return False
+        if run and not run.begin_save():
+            # Timed out; the coordinator already counted it as failed
+            return False
+        return self._save_one(item, item_id, result)
+
+    def _save_one(self, item: Any, item_id: str, result: Any) -> bool:
+        try:
+            if result:
+                if self.save_result(item, result):
+                    self.logger.info(f"✓ Successfully processed {item_id}")
+                    return True
+                self.logger.warning(f"✗ Failed to save result for {item_id}")
+            else:
+                self.logger.warning(f"✗ Failed to process {item_id}")
+        except Exception as e:
+            self.logger.error(f"✗ Error processing {item_id}: {e}")
+        return False
+
+    def _log_start(self, item: Any, position: str) -> str:
+        item_id = self._get_item_id(item)
+        item_title = self._get_item_title(item)
+        display_title = item_title[:60] + "..." if len(item_title) > 60 else item_title
+
+        self.logger.info(f"[{position}] Processing {display_title} (ID: {item_id})")
+        return item_id
+
     def _get_item_id(self, item: Any) -> str:
         """Extract item ID, handling different item types including X posts"""
         if hasattr(item, "id"):
@@ -0,0 +1,58 @@
+from typing import Any, Callable, Dict, List, Optional
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """
+    Buffers keyed results and saves them together.
+
+    write takes a dict of key -> value and returns how many were saved. It
+    is called once max_items results are waiting or max_seconds have passed
+    since the last write, so a crash loses at most one batch of work. Results
+    can be added from several threads while another one flushes. on_write,
+    if set, gets the keys of every batch once it is written.
+    """
+
+    def __init__(self, write: Callable[[Dict[str, Any]], int], max_items: int = 50,
+                 max_seconds: Optional[float] = 30.0, on_write: Optional[Callable[[List[str]], None]] = None):
+        self.write = write
+        self.on_write = on_write
+        self.max_items = max_items
+        self.max_seconds = max_seconds
+        self._pending: Dict[str, Any] = {}
+        self._last_write = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._pending[key] = value
+
+    def due(self) -> bool:
+        if len(self._pending) >= self.max_items:
+            return True
+        return self.max_seconds is not None and time.monotonic() - self._last_write >= self.max_seconds
+
+    def flush(self, force: bool = False) -> int:
+        """Write pending results if due (or always with force), returning how many failed to save"""
+        with self._lock:
+            if not self._pending or not (force or self.due()):
+                return 0
+            batch, self._pending = self._pending, {}
+            self._last_write = time.monotonic()
+        try:
+            saved = self.write(batch)
+        except Exception as e:
+            logger.error(f"✗ Failed to save batch of {len(batch)} results: {e}")
+            return len(batch)
+        if saved < len(batch):
+            logger.warning(f"✗ Saved {saved} of {len(batch)} results in batch")
+        if self.on_write:
+            self.on_write(list(batch))
+        return len(batch) - saved
@@ -0,0 +1,53 @@
+from datetime import timedelta
+from typing import List, Optional
+import os
+import socket
+import time
+import uuid
+from app.database.repository import Repository
+
+
+class JobQueue:
+    """
+    A worker's handle on the jobs of one stage.
+
+    claim leases a batch of jobs to this worker; renew_if_due extends the
+    lease of the batch once a third of it has passed, so a worker that dies
+    loses its jobs to others after at most lease_seconds. Completing or
+    failing a job only takes effect while this worker still holds it; a
+    failed job is retried after retry_seconds, doubling with each attempt.
+    """
+
+    def __init__(self, stage: str, worker_id: Optional[str] = None, lease_seconds: float = 300.0,
+                 max_attempts: int = 3, retry_seconds: float = 60.0, repo: Optional[Repository] = None):
+        self.stage = stage
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.retry_delay = timedelta(seconds=retry_seconds)
+        self.repo = repo or Repository()
+        self.claimed: List[str] = []
+        self._renewed_at = time.monotonic()
+
+    def enqueue(self, keys: List[str]) -> int:
+        return self.repo.enqueue_jobs(self.stage, keys)
+
+    def reset_failed(self, keys: Optional[List[str]] = None) -> int:
+        return self.repo.reset_failed_jobs(self.stage, keys)
+
+    def claim(self, limit: int) -> List[str]:
+        self.claimed = self.repo.claim_jobs(self.stage, self.worker_id, limit, self.lease, self.max_attempts)
+        self._renewed_at = time.monotonic()
+        return self.claimed
+
+    def renew_if_due(self) -> None:
+        if self.claimed and time.monotonic() - self._renewed_at >= self.lease.total_seconds() / 3:
+            self.repo.renew_job_leases(self.stage, self.worker_id, self.claimed, self.lease)
+            self._renewed_at = time.monotonic()
+
+    def complete(self, keys: List[str]) -> int:
+        return self.repo.complete_jobs(self.stage, self.worker_id, keys)
+
+    def fail(self, keys: List[str], error: Optional[str] = None) -> int:
+        return self.repo.fail_jobs(self.stage, self.worker_id, keys, self.max_attempts, error=error,
+                                   retry_delay=self.retry_delay)
@@ -0,0 +1,149 @@
+from typing import Any, Dict, Optional
+from abc import abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import multiprocessing
+import threading
+import time
+from app.scrapers.base import BaseScraper, convert_html
+from .base import BaseProcessService
+from .batch_writer import BatchWriter
+
+
+class MarkdownProcessService(BaseProcessService):
+    """
+    Base for processors that download scraped pages and store them as markdown.
+
+    In parallel mode, page downloads overlap on a thread pool, HTML to
+    markdown conversion runs in a process pool and each item has to be
+    downloaded (retries included) and converted within item_timeout seconds;
+    fetch_workers sets the concurrency, so process() takes no max_workers,
+    mode or item_timeout. In both modes results are saved in batches of batch_size, or sooner once
+    flush_seconds have passed. The returned counts mean the same either way.
+    """
+
+    def __init__(self, scraper: BaseScraper, parallel: bool = False, fetch_workers: int = 8,
+                 convert_workers: Optional[int] = None, item_timeout: float = 60.0, batch_size: int = 20,
+                 flush_seconds: float = 30.0):
+        super().__init__()
+        self.scraper = scraper
+        self.parallel = parallel
+        self.fetch_workers = fetch_workers
+        self.convert_workers = convert_workers
+        self.item_timeout = item_timeout
+        self.batch_size = batch_size
+        # Set once a conversion outlives its item's deadline; its worker may be stuck
+        self._conversion_timed_out = threading.Event()
+        self.writer = BatchWriter(self.save_results, max_items=batch_size, max_seconds=flush_seconds)
+
+    def process_item(self, item) -> Optional[str]:
+        return self.scraper.url_to_markdown(item.url)
+
+    def save_result(self, item, result: str) -> bool:
+        self.writer.add(item.guid, result)
+        return True
+
+    def flush_results(self, force: bool = False) -> int:
+        return self.writer.flush(force=force)
+
+    @abstractmethod
+    def save_results(self, results: Dict[str, str]) -> int:
+        """Save markdown keyed by guid, returning how many rows were updated"""
+        pass
+
+    def process(self, limit: Optional[int] = None, **kwargs) -> Dict[str, Any]:
+        if not self.parallel:
+            return super().process(limit=limit, **kwargs)
+        if kwargs:
+            raise TypeError(
+                f"process() got {', '.join(sorted(kwargs))} in parallel mode; "
+                f"set fetch_workers and item_timeout on the processor instead"
+            )
+
+        items = self.get_items_to_process(limit=limit)
+        total = len(items)
+        processed = 0
+        failed = 0
+
+        self.logger.info(f"Starting parallel processing for {total} items")
+
+        self._conversion_timed_out.clear()
+        # Spawn rather than fork: the fetch threads may already be running
+        convert_pool = ProcessPoolExecutor(
+            max_workers=self.convert_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        fetch_pool = ThreadPoolExecutor(max_workers=self.fetch_workers)
+        try:
+            # Read attributes up front; ORM objects must not be touched from worker threads
+            futures = {
+                fetch_pool.submit(self._fetch_and_convert, item.url, convert_pool): item.guid
+                for item in items
+            }
+            for idx, future in enumerate(as_completed(futures), 1):
+                guid = futures[future]
+                try:
+                    markdown = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.logger.error(f"[{idx}/{total}] ✗ Error processing {guid}: {e!r}")
+                    continue
+
+                if not markdown:
+                    failed += 1
+                    self.logger.warning(f"[{idx}/{total}] ✗ Failed to process {guid}")
+                    continue
+
+                self.writer.add(guid, markdown)
+                processed += 1
+                self.logger.info(f"[{idx}/{total}] ✓ Converted {guid}")
+                lost = self.flush_results()
+                processed -= lost
+                failed += lost
+        finally:
+            fetch_pool.shutdown(wait=True, cancel_futures=True)
+            self._shutdown_convert_pool(convert_pool)
+            lost = self.flush_results(force=True)
+            processed -= lost
+            failed += lost
+
+        self.logger.info(f"Processing complete: {processed} processed, {failed} failed out of {total} total")
+
+        return {
+            "total": total,
+            "processed": processed,
+            "failed": failed
+        }
+
+    def _fetch_and_convert(self, url: str, convert_pool: Executor) -> Optional[str]:
+        markdown = self.scraper.cached_markdown(url)
+        if markdown:
+            return markdown
+
+        deadline = time.monotonic() + self.item_timeout
+        html = self.scraper.fetch_html(url, deadline=deadline)
+        if html is None:
+            return None
+        remaining = max(0.0, deadline - time.monotonic())
+        try:
+            markdown = convert_pool.submit(convert_html, html).result(timeout=remaining)
+        except FutureTimeoutError:
+            self._conversion_timed_out.set()
+            raise
+        if markdown:
+            self.scraper.cache_markdown(url, markdown)
+        return markdown
+
+    def _shutdown_convert_pool(self, convert_pool: ProcessPoolExecutor) -> None:
+        if not self._conversion_timed_out.is_set():
+            convert_pool.shutdown(wait=True, cancel_futures=True)
+            return
+        # Every item has finished or given up by now, so a conversion still
+        # running is one that timed out; waiting for it could take forever
+        processes = list((convert_pool._processes or {}).values())
+        convert_pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join(timeout=5)
+        self.logger.warning("Stopped conversion workers left running by timed out items")
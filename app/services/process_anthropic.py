@@ -1,31 +1,33 @@
-from typing import Optional
+from typing import Dict, List, Optional
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.scrapers.anthropic import AnthropicScraper
+from app.scrapers.page_cache import PageCache
 from app.database.repository import Repository
-from .base import BaseProcessService
+from .markdown_processor import MarkdownProcessService
 
 
-class AnthropicMarkdownProcessor(BaseProcessService):
-    def __init__(self):
-        super().__init__()
-        self.scraper = AnthropicScraper()
+class AnthropicMarkdownProcessor(MarkdownProcessService):
+    job_stage = "anthropic_markdown"
+
+    def __init__(self, parallel: bool = False, batch_size: int = 20):
+        super().__init__(AnthropicScraper(page_cache=PageCache()), parallel=parallel, batch_size=batch_size)
         self.repo = Repository()
 
     def get_items_to_process(self, limit: Optional[int] = None) -> list:
         return self.repo.get_anthropic_articles_without_markdown(limit=limit)
 
-    def process_item(self, item) -> Optional[str]:
-        return self.scraper.url_to_markdown(item.url)
+    def get_items_for_keys(self, keys: List[str]) -> list:
+        return self.repo.get_anthropic_articles_without_markdown(keys=keys)
 
-    def save_result(self, item, result: str) -> bool:
-        return self.repo.update_anthropic_article_markdown(item.guid, result)
+    def save_results(self, results: Dict[str, str]) -> int:
+        return self.repo.update_anthropic_articles_markdown(results)
 
 
-def process_anthropic_markdown(limit: Optional[int] = None) -> dict:
-    processor = AnthropicMarkdownProcessor()
+def process_anthropic_markdown(limit: Optional[int] = None, parallel: bool = False) -> dict:
+    processor = AnthropicMarkdownProcessor(parallel=parallel)
     return processor.process(limit=limit)
 
 
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Iterable, List, Optional
 import logging
 from app.agent.digest_agent import DigestAgent, DigestOutput
 from app.database.repository import Repository
@@ -15,13 +15,21 @@ logging.basicConfig(
 
 
 class DigestProcessor(BaseProcessService):
+    job_stage = "digest"
+
     def __init__(self):
         super().__init__()
         self.agent = DigestAgent()
         self.repo = Repository()
 
-    def get_items_to_process(self, limit: Optional[int] = None) -> list:
-        return self.repo.get_articles_without_digest(limit=limit)
+    def get_items_to_process(self, limit: Optional[int] = None) -> Iterable[dict]:
+        return self.repo.iter_articles_without_digest(limit=limit)
+
+    def count_items_to_process(self, items: Iterable[dict], limit: Optional[int] = None) -> Optional[int]:
+        return self.repo.count_articles_without_digest(limit=limit)
+
+    def get_items_for_keys(self, keys: List[str]) -> List[dict]:
+        return list(self.repo.iter_articles_without_digest(keys=keys))
 
     def process_item(self, item: dict) -> Optional[DigestOutput]:
         return self.agent.generate_digest(
@@ -51,9 +59,9 @@ class DigestProcessor(BaseProcessService):
         return item["title"]
 
 
-def process_digests(limit: Optional[int] = None) -> dict:
+def process_digests(limit: Optional[int] = None, max_workers: int = 1) -> dict:
     processor = DigestProcessor()
-    return processor.process(limit=limit)
+    return processor.process(limit=limit, max_workers=max_workers)
 
 
 if __name__ == "__main__":
@@ -1,31 +1,33 @@
-from typing import Optional
+from typing import Dict, List, Optional
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.scrapers.x import XScraper
+from app.scrapers.page_cache import PageCache
 from app.database.repository import Repository
-from .base import BaseProcessService
+from .markdown_processor import MarkdownProcessService
 
 
-class XMarkdownProcessor(BaseProcessService):
-    def __init__(self):
-        super().__init__()
-        self.scraper = XScraper()
+class XMarkdownProcessor(MarkdownProcessService):
+    job_stage = "x_markdown"
+
+    def __init__(self, parallel: bool = False, batch_size: int = 20):
+        super().__init__(XScraper(page_cache=PageCache()), parallel=parallel, batch_size=batch_size)
         self.repo = Repository()
 
     def get_items_to_process(self, limit: Optional[int] = None) -> list:
         return self.repo.get_x_posts_without_markdown(limit=limit)
 
-    def process_item(self, item) -> Optional[str]:
-        return self.scraper.url_to_markdown(item.url)
+    def get_items_for_keys(self, keys: List[str]) -> list:
+        return self.repo.get_x_posts_without_markdown(keys=keys)
 
-    def save_result(self, item, result: str) -> bool:
-        return self.repo.update_x_post_markdown(item.guid, result)
+    def save_results(self, results: Dict[str, str]) -> int:
+        return self.repo.update_x_posts_markdown(results)
 
 
-def process_x_markdown(limit: Optional[int] = None) -> dict:
-    processor = XMarkdownProcessor()
+def process_x_markdown(limit: Optional[int] = None, parallel: bool = False) -> dict:
+    processor = XMarkdownProcessor(parallel=parallel)
     return processor.process(limit=limit)
 
 
@@ -1,46 +1,119 @@
-from typing import Optional
+from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from pydantic import BaseModel
 from app.scrapers.youtube import YouTubeScraper
 from app.database.repository import Repository
 from .base import BaseProcessService
+from .batch_writer import BatchWriter
+from .transcript_cache import TranscriptCache
 import sys
+import threading
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-TRANSCRIPT_UNAVAILABLE_MARKER = "__UNAVAILABLE__"
+
+class TranscriptResult(BaseModel):
+    text: Optional[str] = None
+    error: Optional[str] = None
 
 
 class YouTubeTranscriptProcessor(BaseProcessService):
-    def __init__(self):
+    job_stage = "youtube_transcript"
+
+    def __init__(self, prefetch_workers: int = 8, batch_size: int = 20, flush_seconds: float = 30.0):
+        """prefetch_workers is how many transcripts are downloaded ahead of processing"""
         super().__init__()
-        self.scraper = YouTubeScraper()
+        self.scraper = YouTubeScraper(max_workers=prefetch_workers)
         self.repo = Repository()
         self.unavailable = 0
+        self._unavailable_lock = threading.Lock()
+        self.prefetch_workers = prefetch_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._transcripts: Dict[str, Future] = {}
+        self.writer = BatchWriter(self._save_transcripts, max_items=batch_size, max_seconds=flush_seconds)
+
+    @property
+    def cache(self) -> TranscriptCache:
+        # Built on demand, so worker threads use their own repository session
+        return TranscriptCache(self.repo)
 
     def get_items_to_process(self, limit: Optional[int] = None) -> list:
-        return self.repo.get_youtube_videos_without_transcript(limit=limit)
+        return self._prefetch(self.repo.get_youtube_videos_without_transcript(limit=limit))
+
+    def get_items_for_keys(self, keys: List[str]) -> list:
+        return self._prefetch(self.repo.get_youtube_videos_without_transcript(keys=keys))
+
+    def pending_job_keys(self) -> List[str]:
+        # Without prefetching; transcripts are fetched once a worker claims them
+        return [item.video_id for item in self.repo.get_youtube_videos_without_transcript()]
+
+    def _prefetch(self, items: list) -> list:
+        # Start all transcript fetches now; process_item waits on each in turn,
+        # so downloads overlap while results are still saved one by one
+        if self._executor:
+            self._transcripts = {
+                item.video_id: self._executor.submit(self.scraper.get_transcript, item.video_id)
+                for item in items
+            }
+        return items
+
+    def process_item(self, item) -> TranscriptResult:
+        try:
+            future = self._transcripts.pop(item.video_id, None)
+            transcript_result = future.result() if future else self.scraper.get_transcript(item.video_id)
+            return TranscriptResult(text=transcript_result.text if transcript_result else None)
+        except Exception as e:
+            return TranscriptResult(error=str(e))
+
+    def save_result(self, item, result: TranscriptResult) -> bool:
+        if result.error is not None:
+            # Not known to lack captions; retried soon and counted as failed
+            self.cache.record_error(item.video_id, result.error)
+            return False
+        if result.text is None:
+            # Negative entry: retried once its backoff expires
+            self.cache.record_unavailable(item.video_id)
+            with self._unavailable_lock:
+                self.unavailable += 1
+            return True
+        self.writer.add(item.video_id, result.text)
+        return True
+
+    def flush_results(self, force: bool = False) -> int:
+        return self.writer.flush(force=force)
+
+    def _save_transcripts(self, transcripts: Dict[str, str]) -> int:
+        saved = self.repo.update_youtube_videos_transcript(transcripts)
+        self.cache.record_available(list(transcripts))
+        return saved
+
+    def process(self, limit: Optional[int] = None, **kwargs) -> dict:
+        self._executor = ThreadPoolExecutor(max_workers=self.prefetch_workers)
+        try:
+            result = super().process(limit=limit, **kwargs)
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            self._transcripts = {}
+        result["unavailable"] = self.unavailable
+        return result
 
-    def process_item(self, item) -> Optional[str]:
+    def run_worker(self, **kwargs) -> dict:
+        self._executor = ThreadPoolExecutor(max_workers=self.prefetch_workers)
         try:
-            transcript_result = self.scraper.get_transcript(item.video_id)
-            return transcript_result.text if transcript_result else TRANSCRIPT_UNAVAILABLE_MARKER
-        except Exception:
-            return TRANSCRIPT_UNAVAILABLE_MARKER
-
-    def save_result(self, item, result: str) -> bool:
-        success = self.repo.update_youtube_video_transcript(item.video_id, result)
-        if result == TRANSCRIPT_UNAVAILABLE_MARKER:
-            self.unavailable += 1
-        return success
-
-    def process(self, limit: Optional[int] = None) -> dict:
-        result = super().process(limit=limit)
+            result = super().run_worker(**kwargs)
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            self._transcripts = {}
         result["unavailable"] = self.unavailable
         return result
 
 
-def process_youtube_transcripts(limit: Optional[int] = None) -> dict:
-    processor = YouTubeTranscriptProcessor()
-    return processor.process(limit=limit)
+def process_youtube_transcripts(limit: Optional[int] = None, max_workers: int = 1,
+                                prefetch_workers: int = 8) -> dict:
+    processor = YouTubeTranscriptProcessor(prefetch_workers=prefetch_workers)
+    return processor.process(limit=limit, max_workers=max_workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,154 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import logging
+import queue
+import threading
+from app.database.repository import Repository
+from .base import BaseProcessService
+from .process_anthropic import AnthropicMarkdownProcessor
+from .process_digest import DigestProcessor
+from .process_x import XMarkdownProcessor
+from .process_youtube import YouTubeTranscriptProcessor
+
+logger = logging.getLogger(__name__)
+
+# Tells a digest worker that nothing more is coming
+_DONE = None
+
+
+class _QueuedDigestProcessor(DigestProcessor):
+    """Digests the items a StreamingPipeline queues, until it says it is done"""
+
+    def __init__(self, pipeline: "StreamingPipeline"):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def get_items_to_process(self, limit: Optional[int] = None) -> Iterator[dict]:
+        return self.pipeline._queued_items(self)
+
+    def count_items_to_process(self, items: Iterable[dict], limit: Optional[int] = None) -> Optional[int]:
+        return None
+
+
+class StreamingPipeline:
+    """
+    Runs markdown, transcript and digest processing as connected stages.
+
+    Each content stage hands the digest ids of every batch it stores to a
+    bounded queue, and digest_workers threads summarise them while the
+    content stages keep downloading. When the queue is full, storing a batch
+    waits for the digest workers, which bounds the work in flight. Items that
+    were ready before the run (OpenAI articles, bodies stored earlier) are
+    queued at the start.
+    """
+
+    def __init__(self, digest_workers: int = 4, queue_size: int = 100, batch_size: int = 5):
+        self.digest_workers = digest_workers
+        self.batch_size = batch_size
+        self.queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=queue_size)
+        self._queued: set = set()
+        self._lock = threading.Lock()
+        self._digests: List[Dict[str, Any]] = []
+
+    def run(self) -> Dict[str, Any]:
+        stages = {
+            "anthropic": ("anthropic", lambda: AnthropicMarkdownProcessor(batch_size=self.batch_size)),
+            "x": ("x", lambda: XMarkdownProcessor(batch_size=self.batch_size)),
+            "youtube": ("youtube", lambda: YouTubeTranscriptProcessor(batch_size=self.batch_size)),
+        }
+        processing: Dict[str, Any] = {}
+
+        # Built here, so a misconfigured agent fails before any stage starts
+        digesters = [_QueuedDigestProcessor(self) for _ in range(self.digest_workers)]
+        workers = [
+            threading.Thread(target=self._digest_worker, args=(digester,), name=f"digest-{i}", daemon=True)
+            for i, digester in enumerate(digesters)
+        ]
+        producers = [threading.Thread(target=self._enqueue_backlog, name="backlog", daemon=True)] + [
+            threading.Thread(target=self._run_stage, args=(name, source, build, processing), name=name, daemon=True)
+            for name, (source, build) in stages.items()
+        ]
+        for thread in workers + producers:
+            thread.start()
+        try:
+            for thread in producers:
+                thread.join()
+        finally:
+            for _ in workers:
+                self.queue.put(_DONE)
+            for thread in workers:
+                thread.join()
+
+        digests = {
+            count: sum(result[count] for result in self._digests)
+            for count in ("total", "processed", "failed")
+        }
+        logger.info(f"Streaming pipeline complete: {digests['processed']} digests, {digests['failed']} failed")
+        return {"processing": processing, "digests": digests}
+
+    def _enqueue(self, keys: List[str]) -> None:
+        for key in keys:
+            with self._lock:
+                if key in self._queued:
+                    continue
+                self._queued.add(key)
+            # Blocks while the digest workers are behind
+            self.queue.put(key)
+
+    def _enqueue_backlog(self) -> None:
+        try:
+            repo = Repository()
+            self._enqueue([f"{item['type']}:{item['id']}" for item in repo.iter_articles_without_digest()])
+            repo.session.close()
+        except Exception as e:
+            logger.error(f"✗ Failed to queue pending digests: {e}")
+
+    def _run_stage(self, name: str, source: str, build: Callable[[], BaseProcessService],
+                   processing: Dict[str, Any]) -> None:
+        try:
+            processor = build()
+            processor.writer.on_write = lambda keys: self._enqueue([f"{source}:{key}" for key in keys])
+            processing[name] = processor.process()
+            logger.info(f"✓ {name} stage finished: {processing[name]['processed']} processed "
+                        f"({processing[name]['failed']} failed)")
+        except Exception as e:
+            logger.error(f"✗ {name} stage failed: {e}")
+            processing[name] = {"total": 0, "processed": 0, "failed": 0, "error": str(e)}
+
+    def _digest_worker(self, processor: DigestProcessor) -> None:
+        try:
+            result = processor.process()
+        except Exception as e:
+            logger.error(f"✗ Digest worker failed: {e}")
+            # Keep taking keys so the content stages do not block on a full
+            # queue; the items are digested on the next run
+            while self.queue.get() is not _DONE:
+                pass
+            return
+        finally:
+            processor.repo.session.close()
+        with self._lock:
+            self._digests.append(result)
+
+    def _queued_items(self, processor: DigestProcessor) -> Iterator[dict]:
+        done = False
+        while not done:
+            keys = [self.queue.get()]
+            # Take what else is waiting, so items are loaded a batch at a time.
+            # Stop at the first _DONE; the others belong to the other workers.
+            while keys[-1] is not _DONE and len(keys) < self.batch_size:
+                try:
+                    keys.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if keys[-1] is _DONE:
+                done = True
+                keys.pop()
+            if not keys:
+                continue
+            try:
+                items = processor.get_items_for_keys(keys)
+            except Exception as e:
+                # Keep consuming, or the content stages would block on a full queue
+                logger.error(f"✗ Failed to load {len(keys)} items for digests: {e}")
+                continue
+            yield from items
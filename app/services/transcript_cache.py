@@ -0,0 +1,52 @@
+from datetime import timedelta
+from typing import List, Optional
+from app.database.repository import Repository
+
+
+class TranscriptCache:
+    """
+    Tracks transcript fetch attempts per video_id.
+
+    Videos with a transcript get a positive entry. Videos without one get a
+    negative entry that expires after an exponentially growing delay (1h, 2h,
+    4h, ... up to max_delay), since captions often appear some hours after
+    upload. Fetches that failed for another reason (a blocked IP, a network
+    error) are retried sooner: after error_delay, doubling with each attempt
+    up to max_error_delay. get_youtube_videos_without_transcript only returns
+    videos whose entry has expired.
+    """
+
+    def __init__(self, repo: Repository, base_delay: timedelta = timedelta(hours=1),
+                 max_delay: timedelta = timedelta(days=7), error_delay: timedelta = timedelta(minutes=10),
+                 max_error_delay: timedelta = timedelta(hours=6)):
+        self.repo = repo
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.error_delay = error_delay
+        self.max_error_delay = max_error_delay
+
+    def retry_delay(self, previous_attempts: int) -> timedelta:
+        return min(self.max_delay, self.base_delay * (2 ** previous_attempts))
+
+    def error_retry_delay(self, previous_attempts: int) -> timedelta:
+        return min(self.max_error_delay, self.error_delay * (2 ** previous_attempts))
+
+    def record_available(self, video_ids: List[str]) -> None:
+        self.repo.record_transcripts_available(video_ids)
+
+    def record_unavailable(self, video_id: str) -> None:
+        previous = self.repo.get_transcript_fetch(video_id)
+        self.repo.record_transcript_fetch(
+            video_id,
+            status="unavailable",
+            retry_delay=self.retry_delay(previous.attempts if previous else 0),
+        )
+
+    def record_error(self, video_id: str, error: str) -> None:
+        previous = self.repo.get_transcript_fetch(video_id)
+        self.repo.record_transcript_fetch(
+            video_id,
+            status="error",
+            retry_delay=self.error_retry_delay(previous.attempts if previous else 0),
+            error=error,
+        )
@@ -0,0 +1,53 @@
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.services.process_anthropic import AnthropicMarkdownProcessor
+from app.services.process_x import XMarkdownProcessor
+from app.services.process_youtube import YouTubeTranscriptProcessor
+from app.services.process_digest import DigestProcessor
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+PROCESSORS = {
+    "anthropic": AnthropicMarkdownProcessor,
+    "x": XMarkdownProcessor,
+    "youtube": YouTubeTranscriptProcessor,
+    "digest": DigestProcessor,
+}
+
+
+def run_worker(stage: str, batch_size: int = 20, lease_seconds: float = 300.0, enqueue: bool = True,
+               retry_failed: bool = False) -> dict:
+    """
+    Run one worker for a processing stage until its queue is drained.
+
+    Start as many as needed, on one machine or several; they share the jobs
+    table and each item is processed by one of them.
+    """
+    processor = PROCESSORS[stage]()
+    return processor.run_worker(batch_size=batch_size, lease_seconds=lease_seconds, enqueue=enqueue,
+                                retry_failed=retry_failed)
+
+
+if __name__ == "__main__":
+    # python app/worker.py <anthropic|x|youtube|digest> [batch_size] [--no-enqueue] [--retry-failed]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args or args[0] not in PROCESSORS:
+        print(f"Usage: python app/worker.py <{'|'.join(PROCESSORS)}> [batch_size] [--no-enqueue] [--retry-failed]")
+        sys.exit(2)
+    batch_size = int(args[1]) if len(args) > 1 else 20
+    result = run_worker(args[0], batch_size=batch_size, enqueue="--no-enqueue" not in sys.argv,
+                        retry_failed="--retry-failed" in sys.argv)
+    print(f"Processed: {result['processed']}")
+    print(f"Failed: {result['failed']}")
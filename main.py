@@ -1,8 +1,8 @@
 from app.daily_runner import run_daily_pipeline
 
 
-def main(hours: int = 24, top_n: int = 10):
-    return run_daily_pipeline(hours=hours, top_n=top_n)
+def main(hours: int = 24, top_n: int = 10, streaming: bool = False, resume: bool = False):
+    return run_daily_pipeline(hours=hours, top_n=top_n, streaming=streaming, resume=resume)
 
 
 if __name__ == "__main__":
@@ -10,11 +10,12 @@ if __name__ == "__main__":
     
     hours = 24
     top_n = 10
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
     
-    if len(sys.argv) > 1:
-        hours = int(sys.argv[1])
-    if len(sys.argv) > 2:
-        top_n = int(sys.argv[2])
+    if len(args) > 0:
+        hours = int(args[0])
+    if len(args) > 1:
+        top_n = int(args[1])
     
-    result = main(hours=hours, top_n=top_n)
+    result = main(hours=hours, top_n=top_n, streaming="--streaming" in sys.argv, resume="--resume" in sys.argv)
     exit(0 if result["success"] else 1)
\ No newline at end of file
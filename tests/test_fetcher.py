@@ -0,0 +1,52 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.scrapers.fetcher import FetchError, HttpFetcher
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps the connection open between requests
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"x" * (1000 if self.path == "/large" else 10)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpFetcherStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.host = f"127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_repeated_requests_reuse_the_connection(self):
+        fetcher = HttpFetcher()
+        for _ in range(5):
+            fetcher.get(f"{self.base_url}/small")
+        stats = fetcher.stats()[self.host]
+        self.assertEqual(stats["requests"], 5)
+        self.assertGreater(stats["reuse_ratio"], 0)
+
+    def test_size_cap_counts_as_an_error(self):
+        fetcher = HttpFetcher()
+        with self.assertRaises(FetchError):
+            fetcher.get(f"{self.base_url}/large", max_bytes=100)
+        stats = fetcher.stats()[self.host]
+        self.assertEqual(stats["requests"], 1)
+        self.assertEqual(stats["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import hashlib
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from app.scrapers.page_cache import PageCache
+
+
+class PageCacheEvictionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _files(self, pattern: str) -> list:
+        return list(self.root.glob(pattern))
+
+    def _size(self) -> int:
+        return sum(p.stat().st_size for p in self.root.glob("**/*") if p.is_file())
+
+    def test_entries_count_toward_size_and_follow_evicted_blobs(self):
+        cache = PageCache(directory=self.directory.name, max_bytes=10 ** 9)
+        for i in range(20):
+            html = os.urandom(2000).hex()
+            cache.put_html(f"https://example.com/{i}", html)
+            # Lower numbers were used longer ago
+            sha = hashlib.sha256(html.encode()).hexdigest()
+            used_at = time.time() - 1000 + i
+            os.utime(self.root / "blobs" / sha[:2] / f"{sha}.gz", (used_at, used_at))
+
+        cache.max_bytes = self._size() // 2
+        cache.evict()
+
+        self.assertLessEqual(self._size(), cache.max_bytes)
+        blobs = len(self._files("blobs/*/*.gz"))
+        self.assertLess(blobs, 20)
+        # Entries of evicted blobs are gone too
+        self.assertEqual(len(self._files("entries/*.json")), blobs)
+        self.assertIsNone(cache.get_html("https://example.com/0"))
+        self.assertIsNotNone(cache.get_html("https://example.com/19"))
+
+    def test_expired_entries_are_deleted(self):
+        cache = PageCache(directory=self.directory.name, max_bytes=10 ** 9, html_ttl=0, markdown_ttl=0)
+        cache.put_html("https://example.com/old", "<p>old</p>")
+        time.sleep(0.01)
+        cache.evict()
+        self.assertEqual(self._files("entries/*.json"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from youtube_transcript_api._errors import VideoUnavailable
+
+from app.database.migrations import run_migrations
+from app.database.models import TranscriptFetch
+from app.database.repository import Repository
+from app.services.process_youtube import YouTubeTranscriptProcessor
+
+
+class TranscriptFailureTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{Path(self.directory.name) / 'test.db'}")
+        run_migrations(self.engine)
+        self.repo = Repository(session=Session(bind=self.engine))
+        self.repo.bulk_create_youtube_videos([
+            {"video_id": video_id, "title": video_id, "url": f"https://youtu.be/{video_id}",
+             "published_at": datetime.now(timezone.utc)}
+            for video_id in ("removed", "blocked")
+        ])
+
+    def tearDown(self):
+        self.repo.session.close()
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def _process(self) -> dict:
+        def fetch(video_id):
+            if video_id == "removed":
+                raise VideoUnavailable(video_id)
+            raise RuntimeError("429 Too Many Requests")
+
+        processor = YouTubeTranscriptProcessor()
+        processor.repo = self.repo
+        for api, limiter in processor.scraper._transcript_clients:
+            api.fetch = fetch
+            limiter.acquire = lambda: None
+        return processor.process()
+
+    def _fetch(self, video_id: str) -> TranscriptFetch:
+        self.repo.session.expire_all()
+        return self.repo.get_transcript_fetch(video_id)
+
+    def _backoff(self, fetch: TranscriptFetch) -> timedelta:
+        return fetch.retry_after - fetch.last_attempt_at
+
+    def test_unavailable_video_is_backed_off_not_failed(self):
+        result = self._process()
+        self.assertEqual(result["unavailable"], 1)
+        self.assertEqual(result["failed"], 1)
+        fetch = self._fetch("removed")
+        self.assertEqual(fetch.status, "unavailable")
+        self.assertEqual(fetch.attempts, 1)
+        self.assertEqual(self._backoff(fetch), timedelta(hours=1))
+
+    def test_errors_back_off_exponentially(self):
+        self._process()
+        fetch = self._fetch("blocked")
+        self.assertEqual(fetch.status, "error")
+        self.assertIn("429", fetch.last_error)
+        self.assertEqual(self._backoff(fetch), timedelta(minutes=10))
+
+        # Make both due again, as if their backoff had passed
+        self.repo.session.query(TranscriptFetch).update({"retry_after": None})
+        self.repo.session.commit()
+        self._process()
+        self.assertEqual(self._backoff(self._fetch("blocked")), timedelta(minutes=20))
+        self.assertEqual(self._backoff(self._fetch("removed")), timedelta(hours=2))
+
+
+if __name__ == "__main__":
+    unittest.main()